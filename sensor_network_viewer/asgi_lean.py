@@ -0,0 +1,9 @@
+# uvicorn sensor_network_viewer.asgi_lean:application --workers 1
+# (a simulação é estado do processo: um worker por instância)
+import os
+from django.core.asgi import get_asgi_application
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE','sensor_network_viewer.settings_lean')
+# sem runserver/nginx na frente: o próprio app serve /static/
+application = ASGIStaticFilesHandler(get_asgi_application())
@@ -64,4 +64,7 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = []
 
+# Logs no servidor que podem ser abertos por janela de tempo (/api/traces, /api/load)
+SIMULATION_TRACE_DIR = BASE_DIR / 'examples'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
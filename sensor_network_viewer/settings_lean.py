@@ -0,0 +1,27 @@
+# Perfil enxuto: só o app `simulation`, arquivos estáticos e a API.
+# O visualizador não usa banco, admin, auth, sessões nem mensagens.
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.staticfiles',
+    'simulation',
+]
+
+# CSRF continua ativo: upload, speed, mapping etc. dependem dele
+MIDDLEWARE = [
+    'django.middleware.csrf.CsrfViewMiddleware',
+]
+
+ROOT_URLCONF = 'sensor_network_viewer.urls_lean'
+
+TEMPLATES = [{
+    'BACKEND':'django.template.backends.django.DjangoTemplates',
+    'DIRS':[],'APP_DIRS':True,
+    'OPTIONS':{'context_processors':[
+        'django.template.context_processors.request',
+    ]},
+}]
+
+DATABASES = {}
+
+USE_I18N = False  # sem textos traduzidos: evita carregar os catálogos pt-br
@@ -0,0 +1,97 @@
+# simulation/compression.py
+from __future__ import annotations
+import bz2
+import lzma
+import zlib
+from typing import Optional
+
+try:  # zstd é opcional (pacote zstandard)
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# assinaturas (magic bytes) dos formatos aceitos
+MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+SNIFF_BYTES = 6
+
+def detect(name: str = "", head: bytes = b"") -> Optional[str]:
+    """Formato de compressão pelos primeiros bytes (ou, na falta, pela extensão)."""
+    for magic, kind in MAGIC:
+        if head.startswith(magic):
+            return kind
+    if len(head) >= SNIFF_BYTES:
+        return None
+    lower = (name or "").lower()
+    for ext, kind in EXTENSIONS.items():
+        if lower.endswith(ext):
+            return kind
+    return None
+
+def _decompressor(kind: str):
+    if kind == "gzip":
+        return zlib.decompressobj(wbits=31)
+    if kind == "bz2":
+        return bz2.BZ2Decompressor()
+    if kind == "xz":
+        return lzma.LZMADecompressor()
+    if kind == "zstd":
+        if zstandard is None:
+            raise ValueError("suporte a zstd requer o pacote 'zstandard'")
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"compressão desconhecida: {kind}")
+
+# ==============================================================
+# DECODIFICADOR EM STREAMING (detecta o formato no 1º pedaço)
+# ==============================================================
+class StreamDecoder:
+    """
+    Converte pedaços do arquivo enviado em pedaços de XML puro. O formato
+    é detectado pelos primeiros bytes; XML sem compressão passa direto.
+    """
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.kind: Optional[str] = None
+        self._head = b""
+        self._started = False
+        self._dec = None
+
+    def feed(self, chunk: bytes) -> bytes:
+        if not self._started:
+            self._head += chunk
+            if len(self._head) < SNIFF_BYTES:
+                return b""
+            chunk, self._head = self._head, b""
+            self._start(chunk)
+        return self._decompress(chunk)
+
+    def flush(self) -> bytes:
+        out = b""
+        if not self._started:  # arquivo menor que SNIFF_BYTES
+            chunk, self._head = self._head, b""
+            self._start(chunk)
+            out = self._decompress(chunk)
+        if self._dec is not None and hasattr(self._dec, "flush"):
+            out += self._dec.flush()
+        return out
+
+    def _start(self, head: bytes) -> None:
+        self._started = True
+        self.kind = detect(self.name, head)
+        self._dec = _decompressor(self.kind) if self.kind else None
+
+    def _decompress(self, chunk: bytes) -> bytes:
+        if self._dec is None or not chunk:
+            return chunk
+        out = self._dec.decompress(chunk)
+        # gzip/xz/bz2 concatenados (vários membros): reinicia no restante
+        while getattr(self._dec, "eof", False) and getattr(self._dec, "unused_data", b""):
+            rest = self._dec.unused_data
+            self._dec = _decompressor(self.kind)
+            out += self._dec.decompress(rest)
+        return out
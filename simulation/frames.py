@@ -0,0 +1,76 @@
+# simulation/frames.py
+from __future__ import annotations
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:  # brotli é opcional; sem ele servimos só gzip
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024   # respostas menores vão sem compressão
+FRAME_CACHE_SIZE = 8        # quadros (versão + viewport) mantidos em memória
+
+# ==============================================================
+# QUADRO SERIALIZADO (JSON + versões comprimidas, sob demanda)
+# ==============================================================
+@dataclass
+class EncodedFrame:
+    etag: str
+    body: bytes
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def pick(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Corpo e Content-Encoding mais adequados ao Accept-Encoding do cliente."""
+        if len(self.body) < COMPRESS_MIN_BYTES:
+            return self.body, None
+        accepted = {p.split(";")[0].strip().lower() for p in accept_encoding.split(",")}
+        if brotli is not None and "br" in accepted:
+            return self._encode("br"), "br"
+        if "gzip" in accepted:
+            return self._encode("gzip"), "gzip"
+        return self.body, None
+
+    def _encode(self, enc: str) -> bytes:
+        if enc not in self.encoded:
+            if enc == "br":
+                self.encoded[enc] = brotli.compress(self.body, quality=4)
+            else:
+                self.encoded[enc] = gzip.compress(self.body, compresslevel=5, mtime=0)
+        return self.encoded[enc]
+
+# ==============================================================
+# CACHE LRU DE QUADROS POR ETAG
+# ==============================================================
+class FrameCache:
+    """Compartilhado entre as threads do servidor: get/put sob um lock."""
+    def __init__(self, size: int = FRAME_CACHE_SIZE):
+        self.size = size
+        self._frames: "OrderedDict[str, EncodedFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str) -> Optional[EncodedFrame]:
+        with self._lock:
+            frame = self._frames.get(etag)
+            if frame is not None:
+                self._frames.move_to_end(etag)
+            return frame
+
+    def put(self, etag: str, payload: dict) -> EncodedFrame:
+        body = json.dumps(payload, cls=DjangoJSONEncoder).encode("utf-8")  # fora do lock
+        frame = EncodedFrame(etag, body)
+        with self._lock:
+            self._frames[etag] = frame
+            self._frames.move_to_end(etag)
+            while len(self._frames) > self.size:
+                self._frames.popitem(last=False)
+        return frame
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
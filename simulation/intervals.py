@@ -0,0 +1,85 @@
+# simulation/intervals.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Tuple
+
+Interval = Tuple[float, float, Any]  # (início, fim, objeto)
+
+# ==============================================================
+# ÁRVORE DE INTERVALOS CENTRADA (estática)
+# ==============================================================
+@dataclass
+class _TreeNode:
+    center: float
+    by_start: List[Interval]            # intervalos que contêm center, início crescente
+    by_end: List[Interval]              # os mesmos, fim decrescente
+    left: Optional['_TreeNode'] = None  # intervalos totalmente antes de center
+    right: Optional['_TreeNode'] = None # intervalos totalmente depois de center
+
+@dataclass
+class IntervalIndex:
+    """
+    Índice estático de intervalos fechados [início, fim]. A consulta por
+    ponto devolve os k intervalos que o contêm em O(log n + k).
+    """
+    root: Optional[_TreeNode] = None
+    size: int = 0
+
+    @classmethod
+    def build(cls, items: Iterable[Interval]) -> 'IntervalIndex':
+        items = [it for it in items if it[1] >= it[0]]
+        return cls(root=cls._build(items), size=len(items))
+
+    @classmethod
+    def _build(cls, items: List[Interval]) -> Optional[_TreeNode]:
+        if not items:
+            return None
+        points = sorted([it[0] for it in items] + [it[1] for it in items])
+        center = points[len(points) // 2]
+        left = [it for it in items if it[1] < center]
+        right = [it for it in items if it[0] > center]
+        mid = [it for it in items if it[0] <= center <= it[1]]
+        return _TreeNode(
+            center=center,
+            by_start=sorted(mid, key=lambda it: it[0]),
+            by_end=sorted(mid, key=lambda it: it[1], reverse=True),
+            left=cls._build(left),
+            right=cls._build(right),
+        )
+
+    def at(self, t: float) -> List[Interval]:
+        """Intervalos que contêm o instante t, em ordem de início."""
+        out: List[Interval] = []
+        node = self.root
+        while node is not None:
+            if t < node.center:
+                for it in node.by_start:
+                    if it[0] > t: break
+                    out.append(it)
+                node = node.left
+            elif t > node.center:
+                for it in node.by_end:
+                    if it[1] < t: break
+                    out.append(it)
+                node = node.right
+            else:
+                out.extend(node.by_start)
+                break
+        out.sort(key=lambda it: it[0])
+        return out
+
+    def any_at(self, t: float) -> bool:
+        """Existe algum intervalo contendo t? (para antes do primeiro achado)"""
+        node = self.root
+        while node is not None:
+            if t < node.center:
+                if node.by_start and node.by_start[0][0] <= t:
+                    return True
+                node = node.left
+            elif t > node.center:
+                if node.by_end and node.by_end[0][1] >= t:
+                    return True
+                node = node.right
+            else:
+                return bool(node.by_start)
+        return False
@@ -0,0 +1,279 @@
+# simulation/loadtest.py
+from __future__ import annotations
+import gzip
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from django.core.servers.basehttp import (ThreadedWSGIServer, WSGIRequestHandler,
+                                          get_internal_wsgi_application)
+
+LOAD_SIZES = (500, 2000, 8000)   # nós dos logs sintéticos
+CANVAS = (1280, 720)             # tamanho do canvas simulado (px)
+ZOOMS = (1.0, 1.0, 2.0, 4.0)     # zoom de cada cliente em relação ao "fit"
+SELECT_PROB = 0.25               # fração de clientes com um nó selecionado
+HTTP_TIMEOUT = 30.0
+
+class LoadTestError(Exception):
+    pass
+
+# ==============================================================
+# LOG SINTÉTICO (mesmo formato do Grubix)
+# ==============================================================
+def synthetic_trace(nodes: int, moves: int, msgs: int, mobile: int = 10,
+                    duration: float = 300.0, side: float = 1000.0,
+                    radius: float = 30.0, seed: int = 1) -> bytes:
+    rnd = random.Random(seed)
+    mobile = min(mobile, nodes)
+    out = ['<?xml version="1.0" encoding="ISO-8859-1"?>',
+           '<simulatorlog><configuration><description write="loadtest" />',
+           f'<field><x>{side}</x><y>{side}</y></field>',
+           f'<simulationtime>{duration}</simulationtime>',
+           f'<communicationradius>{radius}</communicationradius><positions>']
+    for i in range(1, nodes + 1):
+        is_mobile = i <= mobile
+        out.append(f'<position><id>{i}</id><x>{rnd.uniform(0, side):.2f}</x>'
+                   f'<y>{rnd.uniform(0, side):.2f}</y>'
+                   f'<info nodetype="{"UAV" if is_mobile else "REGULAR"}" />'
+                   f'<ismobile>{"true" if is_mobile else "false"}</ismobile></position>')
+    out.append('</positions></configuration><simulationrun>')
+    evs = [(rnd.uniform(0, duration), 0, k) for k in range(moves if mobile else 0)]
+    evs += [(rnd.uniform(0, duration), 1, k) for k in range(msgs)]
+    evs.sort()
+    for t, kind, k in evs:
+        if kind == 0:
+            out.append(f'<move id="{rnd.randint(1, mobile)}" x="{rnd.uniform(0, side):.2f}" '
+                       f'y="{rnd.uniform(0, side):.2f}" time="{t:.4f}" />')
+            continue
+        src = rnd.randint(1, nodes)
+        for _ in range(2):  # broadcast com dois receptores
+            out.append(f'<enqueue><time>{t:.4f}</time><id>{k + 1}</id><receiverid>-1</receiverid>'
+                       f'<tolayer><senderid>{src}</senderid><senderlayer>Physical</senderlayer>'
+                       f'<internreceiverid>{rnd.randint(1, nodes)}</internreceiverid></tolayer></enqueue>')
+    out.append('</simulationrun></simulatorlog>\n')
+    return "\n".join(out).encode("iso-8859-1")
+
+# ==============================================================
+# SERVIDOR LOCAL (o mesmo WSGI com threads do runserver, porta livre)
+# ==============================================================
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+@contextmanager
+def local_server() -> Iterator[str]:
+    httpd = ThreadedWSGIServer(("127.0.0.1", 0), _QuietHandler)
+    httpd.set_app(get_internal_wsgi_application())
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_port}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+# ==============================================================
+# CLIENTE HTTP (conexão persistente + cookies, como um navegador)
+# ==============================================================
+@dataclass
+class Response:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    elapsed: float
+
+    def json(self):
+        data = self.body
+        if self.headers.get("content-encoding") == "gzip":
+            data = gzip.decompress(data)
+        return json.loads(data)
+
+class HttpSession:
+    def __init__(self, base_url: str):
+        u = urlsplit(base_url)
+        self.host, self.port = u.hostname, u.port or 80
+        self.cookies: Dict[str, str] = {}
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Response:
+        hdrs = {"Accept-Encoding": "gzip"}
+        if self.cookies:
+            hdrs["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        hdrs.update(headers or {})
+        for attempt in (0, 1):  # reconecta uma vez se o servidor fechou a conexão
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=HTTP_TIMEOUT)
+            try:
+                t = time.perf_counter()
+                self._conn.request(method, path, body=body, headers=hdrs)
+                resp = self._conn.getresponse()
+                data = resp.read()
+                elapsed = time.perf_counter() - t
+                break
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if attempt:
+                    raise
+        for cookie in resp.headers.get_all("Set-Cookie") or []:
+            name, _, rest = cookie.partition("=")
+            self.cookies[name.strip()] = rest.split(";", 1)[0]
+        if resp.will_close:
+            self.close()
+        return Response(resp.status, {k.lower(): v for k, v in resp.getheaders()}, data, elapsed)
+
+    def post(self, path: str, fields: Optional[Dict[str, str]] = None) -> Response:
+        return self.request("POST", path, urlencode(fields or {}).encode(), {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "X-CSRFToken": self.cookies.get("csrftoken", ""),
+        })
+
+    def upload(self, name: str, content: bytes) -> Response:
+        boundary = uuid.uuid4().hex
+        body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n').encode() + content + \
+               f'\r\n--{boundary}--\r\n'.encode()
+        return self.request("POST", "/api/upload", body, {
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "X-CSRFToken": self.cookies.get("csrftoken", ""),
+        })
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+# ==============================================================
+# CLIENTE SIMULADO: o laço poll() do simulation.js + comandos
+# ==============================================================
+@dataclass
+class Sample:
+    kind: str        # "state" ou "control"
+    status: int
+    latency: float   # segundos
+    size: int        # bytes do corpo (como trafegaram: gzip quando aplicado)
+
+@dataclass
+class ClientOptions:
+    fps: float = 30.0             # ritmo máximo do poll (requestAnimationFrame, limitado)
+    control_every: float = 2.0    # intervalo médio (s) entre comandos de controle
+    mappings: List[str] = field(default_factory=lambda: ["by_type"])
+
+def _fit_query(state: dict, rng: random.Random) -> str:
+    """Viewport de um cliente: "fit" do bbox, com zoom e centro sorteados."""
+    bbox = state["meta"]["bbox"]
+    w, h = CANVAS
+    scale = 0.9 * min(w / bbox["width"], h / bbox["height"]) * rng.choice(ZOOMS)
+    cx = bbox["minX"] + rng.uniform(0.25, 0.75) * bbox["width"]
+    cy = bbox["minY"] + rng.uniform(0.25, 0.75) * bbox["height"]
+    pad = float(state.get("radius_comm") or 0.0)
+    params = {
+        "x0": f"{cx - w / (2 * scale) - pad:.2f}", "y0": f"{cy - h / (2 * scale) - pad:.2f}",
+        "x1": f"{cx + w / (2 * scale) + pad:.2f}", "y1": f"{cy + h / (2 * scale) + pad:.2f}",
+        "scale": f"{scale:.4f}",
+    }
+    if state["nodes"] and rng.random() < SELECT_PROB:
+        params["sel"] = str(rng.choice(state["nodes"])["id"])
+    return "?" + urlencode(params)
+
+def _control(sess: HttpSession, rng: random.Random, opts: ClientOptions) -> Response:
+    kind = rng.choice(("play", "speed", "mapping"))
+    if kind == "play":
+        return sess.post("/api/play")
+    if kind == "speed":
+        return sess.post("/api/speed", {"speed": f"{rng.choice((0.25, 0.5, 1.0, 2.0))}"})
+    return sess.post("/api/mapping/set", {"key": rng.choice(opts.mappings)})
+
+def run_client(base_url: str, stop_at: float, seed: int, opts: ClientOptions,
+               samples: List[Sample], errors: List[str]) -> None:
+    rng = random.Random(seed)
+    sess = HttpSession(base_url)
+    try:
+        sess.request("GET", "/")  # cookie csrftoken, como ao abrir a página
+        etag, query = None, ""
+        next_ctl = time.perf_counter() + rng.expovariate(1.0 / opts.control_every)
+        while time.perf_counter() < stop_at:
+            t = time.perf_counter()
+            r = sess.request("GET", "/api/state" + query,
+                             headers={"If-None-Match": etag} if etag else None)
+            samples.append(Sample("state", r.status, r.elapsed, len(r.body)))
+            if r.status == 200:
+                etag = r.headers.get("etag")
+                if not query:  # 1º quadro: "fit" como o cliente faz
+                    query = _fit_query(r.json(), rng)
+                    etag = None
+            if time.perf_counter() >= next_ctl:
+                c = _control(sess, rng, opts)
+                samples.append(Sample("control", c.status, c.elapsed, len(c.body)))
+                next_ctl = time.perf_counter() + rng.expovariate(1.0 / opts.control_every)
+            time.sleep(max(0.0, 1.0 / opts.fps - (time.perf_counter() - t)))
+    except (http.client.HTTPException, OSError, ValueError) as e:
+        errors.append(f"{type(e).__name__}: {e}")
+    finally:
+        sess.close()
+
+# ==============================================================
+# CENÁRIO: sobe um log, dá play e mede N clientes por `duration` s
+# ==============================================================
+def _pct(values: List[float], p: float) -> float:
+    """Percentil por posto mais próximo (ms)."""
+    if not values:
+        return 0.0
+    vals = sorted(values)
+    return 1000.0 * vals[min(len(vals) - 1, max(0, int(round(p / 100.0 * len(vals))) - 1))]
+
+def summarize(samples: List[Sample], wall: float) -> Dict:
+    state = [s for s in samples if s.kind == "state"]
+    frames = [s for s in state if s.status == 200]
+    control = [s for s in samples if s.kind == "control"]
+    lat = lambda ss: {f"p{p}": round(_pct([s.latency for s in ss], p), 2) for p in (50, 95, 99)}
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / wall, 1) if wall else 0.0,
+        "frames": len(frames),
+        "frames_per_s": round(len(frames) / wall, 1) if wall else 0.0,
+        "not_modified_pct": round(100.0 * sum(s.status == 304 for s in state) / max(1, len(state)), 1),
+        "bytes_per_frame": round(sum(s.size for s in frames) / max(1, len(frames))),
+        "latency_ms": {"state": lat(state), "control": lat(control)},
+        "http_errors": sum(s.status >= 400 for s in samples),
+    }
+
+def run_scenario(base_url: str, name: str, trace: bytes, clients: int, duration: float,
+                 opts: ClientOptions, seed: int = 1) -> Dict:
+    admin = HttpSession(base_url)
+    admin.request("GET", "/")
+    t = time.perf_counter()
+    r = admin.upload(name, trace)
+    upload_s = time.perf_counter() - t
+    if r.status != 200:
+        raise LoadTestError(f"upload de {name} falhou ({r.status}): {r.body[:200]!r}")
+    mappings = admin.request("GET", "/api/mapping/list")
+    if mappings.status == 200:
+        opts.mappings = [m["key"] for m in mappings.json().get("mappings", [])] or opts.mappings
+    admin.post("/api/speed", {"speed": "1.0"})
+    admin.post("/api/play")
+    admin.close()
+
+    samples: List[Sample] = []   # list.append é atômico: compartilhada entre threads
+    errors: List[str] = []
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run_client, daemon=True,
+                                args=(base_url, start + duration, seed + i, opts, samples, errors))
+               for i in range(clients)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    wall = time.perf_counter() - start
+    report = {"trace": name, "trace_bytes": len(trace), "upload_s": round(upload_s, 2),
+              "clients": clients, "duration_s": round(wall, 1)}
+    report.update(summarize(samples, wall))
+    report["client_errors"] = errors
+    return report
@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand
+from simulation.trace_index import build_index, index_path, CHECKPOINT_BYTES
+
+class Command(BaseCommand):
+    help = "Indexa um log XML (tempo -> offset) para carga parcial por janela de tempo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("logs", nargs="+", help="arquivos .xml do Grubix")
+        parser.add_argument("--every", type=int, default=CHECKPOINT_BYTES,
+                            help="bytes entre checkpoints (padrão: %(default)s)")
+
+    def handle(self, *args, **opts):
+        for log in opts["logs"]:
+            t = time.time()
+            index = build_index(log, every=opts["every"])
+            index.save(index_path(log))
+            self.stdout.write(f"{log}: {len(index.checkpoints)} checkpoints, "
+                              f"tempo máx. {index.time_max:g}, {time.time() - t:.1f}s")
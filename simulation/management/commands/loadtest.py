@@ -0,0 +1,71 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from simulation.loadtest import (LOAD_SIZES, ClientOptions, LoadTestError, local_server,
+                                 run_scenario, synthetic_trace)
+
+class Command(BaseCommand):
+    help = ("Teste de carga da API: N clientes seguem o poll() do simulation.js "
+            "(viewport + If-None-Match) com comandos de play/speed/mapping misturados. "
+            "Sem --url, sobe o app neste processo numa porta livre.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="servidor já em execução (ex.: http://127.0.0.1:8000)")
+        parser.add_argument("--sizes", default=",".join(map(str, LOAD_SIZES)),
+                            help="nós dos logs sintéticos, separados por vírgula (padrão: %(default)s)")
+        parser.add_argument("--trace", action="append", default=[],
+                            help="log real a usar (repetível); substitui os sintéticos")
+        parser.add_argument("--clients", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10.0, help="segundos por log")
+        parser.add_argument("--fps", type=float, default=30.0, help="poll máx. por cliente")
+        parser.add_argument("--control-every", type=float, default=2.0,
+                            help="intervalo médio (s) entre comandos por cliente")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--json", help="grava os relatórios neste arquivo")
+
+    def _traces(self, opts):
+        if opts["trace"]:
+            for path in opts["trace"]:
+                with open(path, "rb") as f:
+                    yield path.rsplit("/", 1)[-1], f.read()
+            return
+        try:
+            sizes = [int(s) for s in opts["sizes"].split(",") if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes deve ser uma lista de inteiros")
+        for n in sizes:
+            yield f"synthetic-{n}.xml", synthetic_trace(n, moves=n, msgs=n, seed=opts["seed"])
+
+    def handle(self, *args, **opts):
+        if opts["clients"] <= 0 or opts["duration"] <= 0 or opts["fps"] <= 0:
+            raise CommandError("--clients, --duration e --fps devem ser positivos")
+        reports = []
+        if opts["url"]:
+            reports = self._run(opts["url"].rstrip("/"), opts)
+        else:
+            with local_server() as url:
+                reports = self._run(url, opts)
+        if opts["json"]:
+            with open(opts["json"], "w") as f:
+                json.dump(reports, f, indent=2)
+
+    def _run(self, url, opts):
+        self.stdout.write(f"alvo: {url}  clientes: {opts['clients']}  duração: {opts['duration']:g}s")
+        self.stdout.write(f"{'log':<22}{'req/s':>8}{'quadros/s':>10}{'304%':>6}{'B/quadro':>10}"
+                          f"{'p50':>8}{'p95':>8}{'p99':>8}{'ctl p95':>9}{'erros':>7}")
+        reports = []
+        for name, trace in self._traces(opts):
+            try:
+                r = run_scenario(url, name, trace, opts["clients"], opts["duration"],
+                                 ClientOptions(fps=opts["fps"], control_every=opts["control_every"]),
+                                 seed=opts["seed"])
+            except (LoadTestError, OSError) as e:
+                raise CommandError(str(e))
+            st = r["latency_ms"]["state"]
+            self.stdout.write(f"{name:<22}{r['throughput_rps']:>8}{r['frames_per_s']:>10}"
+                              f"{r['not_modified_pct']:>6}{r['bytes_per_frame']:>10}"
+                              f"{st['p50']:>8}{st['p95']:>8}{st['p99']:>8}"
+                              f"{r['latency_ms']['control']['p95']:>9}"
+                              f"{r['http_errors'] + len(r['client_errors']):>7}")
+            reports.append(r)
+        self.stdout.write("latências em ms; B/quadro = bytes (no fio) de cada /api/state 200")
+        return reports
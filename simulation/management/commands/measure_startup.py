@@ -0,0 +1,89 @@
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = {
+    "atual":  ("sensor_network_viewer.asgi:application", "sensor_network_viewer.settings"),
+    "enxuto": ("sensor_network_viewer.asgi_lean:application", "sensor_network_viewer.settings_lean"),
+}
+READY_TIMEOUT = 30.0
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _get(port: int, path: str) -> int:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status
+    finally:
+        conn.close()
+
+def _rss_mb(pid: int):
+    """RSS do processo (Linux, /proc); None onde não houver."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+class Command(BaseCommand):
+    help = ("Mede a partida a frio sob uvicorn (1 worker) do perfil atual e do enxuto: "
+            "tempo até o 1º GET / e /api/state, e RSS do worker.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="execuções por perfil (mediana)")
+
+    def _run_once(self, app: str, settings_module: str):
+        port = _free_port()
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1",
+                                 "--port", str(port), "--workers", "1", "--log-level", "warning"],
+                                cwd=settings.BASE_DIR, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            while True:
+                if proc.poll() is not None:
+                    raise CommandError(f"{app} terminou: {proc.stderr.read().decode()[-500:]}")
+                if time.perf_counter() - t0 > READY_TIMEOUT:
+                    raise CommandError(f"{app} não respondeu em {READY_TIMEOUT:g}s")
+                try:
+                    if _get(port, "/") == 200:
+                        break
+                except OSError:
+                    time.sleep(0.005)
+            t_index = time.perf_counter() - t0
+            if _get(port, "/api/state") != 200:
+                raise CommandError(f"{app}: /api/state falhou")
+            t_state = time.perf_counter() - t0
+            return t_index, t_state, _rss_mb(proc.pid)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    def handle(self, *args, **opts):
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError("a medição requer o pacote 'uvicorn'")
+        self.stdout.write(f"{'perfil':<8}{'1º GET / (ms)':>15}{'1º /api/state (ms)':>20}{'RSS (MiB)':>11}")
+        for name, (app, settings_module) in PROFILES.items():
+            runs = [self._run_once(app, settings_module) for _ in range(max(1, opts["runs"]))]
+            med = lambda i: statistics.median(r[i] for r in runs if r[i] is not None) \
+                if any(r[i] is not None for r in runs) else float("nan")
+            self.stdout.write(f"{name:<8}{med(0) * 1000:>15.0f}{med(1) * 1000:>20.0f}{med(2):>11.1f}")
+        self.stdout.write(f"mediana de {opts['runs']} partidas; Python {sys.version.split()[0]}")
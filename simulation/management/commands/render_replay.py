@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from simulation.mapping import MAPPINGS, DEFAULT_MAPPING_KEY
+from simulation.render import RenderSpec, render_replay
+
+class Command(BaseCommand):
+    help = ("Renderiza o replay de um log em PNGs, GIF ou MP4 (numpy + pillow; "
+            "MP4 requer ffmpeg). Trechos do vídeo são divididos entre processos.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("log", help="arquivo do Grubix (.xml, .gz, .bz2, .xz, .zst)")
+        parser.add_argument("out", help="saída: arquivo .gif/.mp4 ou diretório de PNGs")
+        parser.add_argument("--width", type=int, default=1280)
+        parser.add_argument("--height", type=int, default=720)
+        parser.add_argument("--fps", type=int, default=25)
+        parser.add_argument("--speed", type=float, default=1.0,
+                            help="segundos simulados por segundo de vídeo (padrão: %(default)s)")
+        parser.add_argument("--start", type=float, default=0.0, help="tempo simulado inicial")
+        parser.add_argument("--end", type=float, default=None, help="tempo simulado final")
+        parser.add_argument("--mapping", default=DEFAULT_MAPPING_KEY, choices=sorted(MAPPINGS))
+        parser.add_argument("--workers", type=int, default=None,
+                            help="processos (padrão: nº de CPUs)")
+
+    def handle(self, *args, **opts):
+        if opts["fps"] <= 0 or opts["speed"] <= 0:
+            raise CommandError("--fps e --speed devem ser positivos")
+        spec = RenderSpec(width=opts["width"], height=opts["height"], fps=opts["fps"],
+                          sim_per_sec=opts["speed"], t0=opts["start"], t1=opts["end"],
+                          mapping_key=opts["mapping"])
+        t = time.time()
+        try:
+            count = render_replay(opts["log"], opts["out"], spec, opts["workers"])
+        except (RuntimeError, OSError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"{opts['out']}: {count} quadros em {time.time() - t:.1f}s")
@@ -18,6 +18,10 @@ PALETTE_BLUE: List[Color] = [
     ( 66,165,245),( 33,150,243),( 30,136,229),( 25,118,210),
     ( 21,101,192),( 13, 71,161),
 ]
+PALETTE_HEAT: List[Color] = [
+    (255,255,204),(255,237,160),(254,217,118),(254,178, 76),
+    (253,141, 60),(252, 78, 42),(227, 26, 28),(177,  0, 38),
+]
 PALETTE_CAT10: List[Color] = [
     ( 31,119,180),(255,127, 14),( 44,160, 44),(214, 39, 40),(148,103,189),
     (140, 86, 75),(227,119,194),(127,127,127),(188,189, 34),( 23,190,207)
@@ -84,14 +88,11 @@ class MappingByDegree(ColorMapping):
         R = float(meta.get("radius_comm", 0.0) or 0.0)
         if R <= 0 or not nodes: 
             return (180,180,180)
-        deg = 0
-        for m in nodes:
-            if m.node_id == node.node_id: 
-                continue
-            dx = m.x - node.x
-            dy = m.y - node.y
-            if math.hypot(dx, dy) <= R: 
-                deg += 1
+        # graus publicados pelo worker de stats; antes do 1º cálculo, cinza
+        degrees = meta.get("_degrees")
+        if not degrees:
+            return (180,180,180)
+        deg = degrees.get(node.node_id, 0)
         # normaliza pelo máx. grau
         max_deg = meta.get("_degree_max", 1) or 1
         t = deg / max_deg
@@ -100,13 +101,30 @@ class MappingByDegree(ColorMapping):
         # escala contínua
         return {"type": "continuous", "title": self.label,
                 "from": "grau baixo", "to": "grau alto",
-                "colors":[_rgb_to_hex(PALETTE_BLUE[0]), _rgb_to_hex(PALETTE_BLUE[-1])]}
+                "colors":[_rgb_to_hex(PALETTE_BLUE[0]), _rgb_to_hex(PALETTE_BLUE[-1])],
+                "stale": bool(meta.get("_degrees_stale"))}  # graus de posições anteriores
+
+# ========= Por Tráfego (mapa de calor) =========
+class MappingByTraffic(ColorMapping):
+    key = "by_traffic"
+    label = "Por tráfego (pacotes)"
+    def color_of(self, node, nodes, meta) -> Color:
+        # contadores mantidos pelo controlador a cada EventMsg consumido
+        traffic = meta.get("_traffic")
+        if traffic is None:
+            return (180,180,180)
+        return _interp_palette(PALETTE_HEAT, traffic.intensity(node.node_id))
+    def legend(self, nodes, meta) -> Dict:
+        return {"type": "continuous", "title": self.label,
+                "from": "pouco tráfego", "to": "muito tráfego",
+                "colors":[_rgb_to_hex(PALETTE_HEAT[0]), _rgb_to_hex(PALETTE_HEAT[-1])]}
 
 # Registro
 MAPPINGS: Dict[str, ColorMapping] = {
-    MappingByType.key:   MappingByType(),
-    MappingById.key:     MappingById(),
-    MappingByDegree.key: MappingByDegree(),
+    MappingByType.key:    MappingByType(),
+    MappingById.key:      MappingById(),
+    MappingByDegree.key:  MappingByDegree(),
+    MappingByTraffic.key: MappingByTraffic(),
 }
 
 DEFAULT_MAPPING_KEY = MappingByType.key
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional
 import math
 
 # ==============================================================
@@ -10,6 +10,7 @@ import math
 class Position:
     x: float
     y: float
+    time: float=0.0  # instante (simulado) em que o nó passou pelo ponto
     def distance_to(self, other:'Position')->float:
         """Calcula a distância euclidiana entre dois pontos."""
         return math.sqrt((self.x - other.x) ** 2 + (self.y - other.y) ** 2)
@@ -33,11 +34,11 @@ class Node:
     def position(self)->Position: 
         return Position(self.x,self.y)
     
-    def move_to(self, nx: float, ny: float)->None:
-        """Move o nó para uma nova posição."""
+    def move_to(self, nx: float, ny: float, t: float=0.0)->None:
+        """Move o nó para uma nova posição (no instante t)."""
         self.x = nx
         self.y = ny
-        self.track.append(Position(nx,ny))
+        self.track.append(Position(nx,ny,t))
     
     def distance_to(self, other: "Node") -> float:
         """Distância até outro nó."""
@@ -65,7 +66,7 @@ class Move:
     y: float
     
     def apply(self)->None: 
-        self.node.move_to(self.x, self.y)
+        self.node.move_to(self.x, self.y, self.time)
 
 # ==============================================================
 # EVENTGENERIC (equivalente a EventGeneric.java)
@@ -95,6 +96,7 @@ class EventMsg(EventGeneric):
     source: 'Node'
     destinations: List['Node']
     amount_packet: int
+    broadcast: bool = False   # receiverid -1: destinos = quem recebeu o broadcast
     def run(self)->None: 
         pass
         """Executa um envio de pacote entre nós."""
@@ -119,12 +121,14 @@ class DataSimulation:
     events: List[EventGeneric]=field(default_factory=list)
     moves: List[Move]=field(default_factory=list)
     times_move: List[float]=field(default_factory=list)
+    _nodes_by_id: Dict[int, Node]=field(default_factory=dict, repr=False)
     
     def add_node(self, node:Node)->None: 
         self.nodes.append(node)
+        self._nodes_by_id.setdefault(node.node_id, node)
     
     def get_node(self, node_id: int) -> Optional[Node]:
-        return next((n for n in self.nodes if n.node_id==node_id), None)
+        return self._nodes_by_id.get(node_id)
     
     def add_event(self, ev: EventGeneric) -> None: 
         self.events.append(ev)
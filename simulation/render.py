@@ -0,0 +1,288 @@
+# simulation/render.py
+from __future__ import annotations
+import copy
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+try:  # renderização no servidor é opcional (numpy + pillow)
+    import numpy as np
+    from PIL import Image, ImageDraw
+except ImportError:  # pragma: no cover
+    np = Image = ImageDraw = None
+
+from .mapping import DEFAULT_MAPPING_KEY
+from .models import DataSimulation, Position
+from .simulation_core import SimulationController, TRACK_WINDOW
+from .stats import StatsWorker
+from .traffic import TrafficCounters
+from .uploads import TraceIngest
+from .xml_reader import READ_CHUNK
+
+FRAME_PATTERN = "frame_%06d.png"
+TASKS_PER_WORKER = 4      # trechos por processo (equilibra trechos lentos/rápidos)
+BACKGROUND = (255, 255, 255)
+PACKET_COLOR = (13, 110, 253)
+PACKET_SIZE = 6
+TRACK_RGB = {"INTRUDER": (255, 10, 10), "UAV": (13, 110, 253)}  # como no canvas
+
+# ==============================================================
+# PARÂMETROS DO VÍDEO
+# ==============================================================
+@dataclass
+class RenderSpec:
+    width: int = 1280
+    height: int = 720
+    fps: int = 25
+    sim_per_sec: float = 1.0            # segundos simulados por segundo de vídeo
+    t0: float = 0.0
+    t1: Optional[float] = None          # None = até o último evento
+    mapping_key: str = DEFAULT_MAPPING_KEY
+    track_window: float = TRACK_WINDOW
+    node_radius: int = 5
+    margin: int = 20
+
+    def frame_time(self, k: int) -> float:
+        return self.t0 + k * self.sim_per_sec / self.fps
+
+    def frame_count(self, data: DataSimulation) -> int:
+        t1 = self.t1
+        if t1 is None:
+            t1 = data.events[-1].time + 1.0 if data.events else self.t0
+        return max(1, int(math.floor((t1 - self.t0) * self.fps / self.sim_per_sec)) + 1)
+
+@dataclass
+class Projection:
+    """Mundo -> pixels, fixa para o vídeo inteiro (cobre todas as posições)."""
+    minx: float
+    miny: float
+    scale: float
+    ox: float
+    oy: float
+
+    @classmethod
+    def fit(cls, data: DataSimulation, spec: RenderSpec) -> 'Projection':
+        xs = [n.x for n in data.nodes] + [mv.x for mv in data.moves]
+        ys = [n.y for n in data.nodes] + [mv.y for mv in data.moves]
+        minx, maxx = (min(xs), max(xs)) if xs else (0.0, 1.0)
+        miny, maxy = (min(ys), max(ys)) if ys else (0.0, 1.0)
+        w = max(1.0, maxx - minx); h = max(1.0, maxy - miny)
+        scale = min((spec.width - 2 * spec.margin) / w, (spec.height - 2 * spec.margin) / h)
+        ox = (spec.width - w * scale) / 2.0
+        oy = (spec.height - h * scale) / 2.0
+        return cls(minx, miny, scale, ox, oy)
+
+    def to_px(self, xs, ys):
+        xs = np.asarray(xs, dtype=float); ys = np.asarray(ys, dtype=float)
+        return (self.ox + (xs - self.minx) * self.scale,
+                self.oy + (ys - self.miny) * self.scale)
+
+# ==============================================================
+# ESTADO INICIAL DE UM TRECHO (keyframe)
+# ==============================================================
+@dataclass
+class Keyframe:
+    frame: int
+    idx: int
+    time: float
+    positions: Dict[int, Tuple[float, float]]
+    tracks: Dict[int, List[Tuple[float, float, float]]]  # só a cauda visível
+    traffic: TrafficCounters
+    msgs_started: int = 0
+    msgs_completed: int = 0
+    msg_ends: List[float] = field(default_factory=list)
+
+def load_trace(path: str) -> DataSimulation:
+    """Lê um log (XML puro ou comprimido) em streaming."""
+    ingest = TraceIngest(name=path)
+    with open(path, "rb") as f:
+        return ingest.feed_all(iter(lambda: f.read(READ_CHUNK), b""))
+
+class _InlineExecutor(Executor):
+    """Executa na própria chamada: cada quadro usa as stats das suas posições."""
+    def submit(self, fn, *args, **kwargs) -> Future:
+        fut = Future()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+def _replay(data: DataSimulation, spec: RenderSpec) -> SimulationController:
+    sim = SimulationController(_stats=StatsWorker(_InlineExecutor()), _stats_throttle_sec=0.0)
+    sim.init(data)
+    sim.mode = "PLAY"   # o snapshot só inclui pacotes durante a reprodução
+    sim.mapping_key = spec.mapping_key
+    sim.track_window = spec.track_window
+    return sim
+
+def _capture(sim: SimulationController, frame: int) -> Keyframe:
+    tracks = {}
+    for n in sim.data.nodes:
+        if n.track:
+            t_min = n.track[-1].time - sim.track_window
+            tracks[n.node_id] = [(p.x, p.y, p.time) for p in n.track if p.time >= t_min]
+    return Keyframe(
+        frame=frame, idx=sim.idx, time=sim.time_sim,
+        positions={n.node_id: (n.x, n.y) for n in sim.data.nodes},
+        tracks=tracks,
+        traffic=copy.deepcopy(sim.traffic),
+        msgs_started=sim.msgs_started,
+        msgs_completed=sim.msgs_completed,
+        msg_ends=list(sim._msg_ends),
+    )
+
+def _restore(sim: SimulationController, kf: Keyframe) -> None:
+    for n in sim.data.nodes:
+        n.x, n.y = kf.positions[n.node_id]
+        n.track = [Position(*p) for p in kf.tracks.get(n.node_id, ())]
+    sim.idx = kf.idx
+    sim._consumed = kf.idx
+    sim.time_sim = kf.time
+    sim.traffic = copy.deepcopy(kf.traffic)
+    sim.msgs_started = kf.msgs_started
+    sim.msgs_completed = kf.msgs_completed
+    sim._msg_ends = list(kf.msg_ends)
+    sim._tracks = {}
+    sim._grid = None
+    sim._pos_version += 1
+
+def plan_keyframes(data: DataSimulation, spec: RenderSpec, every: int) -> List[Keyframe]:
+    """Uma passada pelo replay guardando o estado a cada `every` quadros."""
+    sim = _replay(data, spec)
+    keyframes = []
+    for k in range(0, spec.frame_count(data), every):
+        sim.advance_to(spec.frame_time(k))
+        keyframes.append(_capture(sim, k))
+    return keyframes
+
+# ==============================================================
+# RASTERIZAÇÃO DE UM QUADRO
+# ==============================================================
+def _hex_to_rgb(c: str) -> Tuple[int, int, int]:
+    c = c.lstrip("#")
+    return int(c[0:2], 16), int(c[2:4], 16), int(c[4:6], 16)
+
+def draw_frame(state: dict, proj: Projection, spec: RenderSpec) -> 'Image.Image':
+    img = Image.new("RGB", (spec.width, spec.height), BACKGROUND)
+    draw = ImageDraw.Draw(img, "RGBA")
+    nodes = state["nodes"]
+    px, py = proj.to_px([n["x"] for n in nodes], [n["y"] for n in nodes])
+    at = {n["id"]: (px[i], py[i]) for i, n in enumerate(nodes)}
+
+    # trilhas (UAV/INTRUDER)
+    for n in nodes:
+        if len(n["track"]) < 2:
+            continue
+        tx, ty = proj.to_px([p["x"] for p in n["track"]], [p["y"] for p in n["track"]])
+        rgb = TRACK_RGB.get((n["type"] or "INTRUDER").upper(), TRACK_RGB["UAV"])
+        draw.line(list(zip(tx.tolist(), ty.tolist())), fill=rgb + (170,), width=2)
+
+    # nós
+    r = spec.node_radius
+    for i, n in enumerate(nodes):
+        x, y = px[i], py[i]
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=_hex_to_rgb(n["color"]), outline=(0, 0, 0))
+
+    # pacotes: quadrado da origem ao destino conforme a fase
+    h = PACKET_SIZE / 2.0
+    for p in state["packets"]:
+        sx, sy = at.get(p["source"]) or proj.to_px(p["x"], p["y"])
+        for did in p["dests"]:
+            if did not in at:
+                continue
+            dx, dy = at[did]
+            x = sx + (dx - sx) * p["phase"]; y = sy + (dy - sy) * p["phase"]
+            draw.rectangle((x - h, y - h, x + h, y + h), fill=PACKET_COLOR)
+
+    draw.text((8, 6), f"t = {state['time']:.2f}  ({state['idx']}/{state['total']})", fill=(0, 0, 0))
+    return img
+
+def _render_range(sim: SimulationController, proj: Projection, spec: RenderSpec,
+                  start: int, stop: int, out_dir: str) -> int:
+    for k in range(start, stop):
+        sim.advance_to(spec.frame_time(k))
+        if spec.mapping_key == "by_degree":
+            sim._request_stats(0.0)  # graus das posições deste quadro (síncrono)
+        state = sim.snapshot(scale=proj.scale)
+        draw_frame(state, proj, spec).save(os.path.join(out_dir, FRAME_PATTERN % k))
+    return stop - start
+
+# ==============================================================
+# POOL DE PROCESSOS: cada processo lê o log uma vez e renderiza trechos
+# ==============================================================
+_WORKER: Dict[str, object] = {}
+
+def _worker_init(path: str, spec: RenderSpec, proj: Projection) -> None:
+    _WORKER["sim"] = _replay(load_trace(path), spec)
+    _WORKER["spec"] = spec
+    _WORKER["proj"] = proj
+
+def _worker_task(kf: Keyframe, stop: int, out_dir: str) -> int:
+    sim = _WORKER["sim"]
+    _restore(sim, kf)
+    return _render_range(sim, _WORKER["proj"], _WORKER["spec"], kf.frame, stop, out_dir)
+
+def render_frames(path: str, spec: RenderSpec, out_dir: str,
+                  workers: Optional[int] = None) -> int:
+    """Renderiza o replay como PNGs numerados em out_dir; devolve o nº de quadros."""
+    if Image is None:
+        raise RuntimeError("renderização requer os pacotes 'numpy' e 'pillow'")
+    os.makedirs(out_dir, exist_ok=True)
+    data = load_trace(path)
+    proj = Projection.fit(data, spec)
+    total = spec.frame_count(data)
+    workers = max(1, workers or os.cpu_count() or 1)
+    if workers == 1:
+        return _render_range(_replay(data, spec), proj, spec, 0, total, out_dir)
+
+    every = max(1, math.ceil(total / (workers * TASKS_PER_WORKER)))
+    keyframes = plan_keyframes(data, spec, every)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init,
+                             initargs=(path, spec, proj)) as pool:
+        futures = [pool.submit(_worker_task, kf, min(kf.frame + every, total), out_dir)
+                   for kf in keyframes]
+        return sum(f.result() for f in futures)
+
+# ==============================================================
+# SAÍDA: sequência de PNG, GIF (pillow) ou MP4 (ffmpeg)
+# ==============================================================
+def _load_frame(frames_dir: str, k: int) -> 'Image.Image':
+    """Quadro k em memória, com o arquivo já fechado."""
+    with Image.open(os.path.join(frames_dir, FRAME_PATTERN % k)) as im:
+        return im.copy()
+
+def encode_gif(frames_dir: str, count: int, fps: int, out_path: str) -> None:
+    # um arquivo aberto por vez: vídeos longos não esgotam os descritores
+    rest = (_load_frame(frames_dir, k) for k in range(1, count))
+    _load_frame(frames_dir, 0).save(out_path, save_all=True, append_images=rest,
+                                    duration=int(round(1000 / fps)), loop=0, optimize=False)
+
+def encode_mp4(frames_dir: str, fps: int, out_path: str) -> None:
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("saída .mp4 requer o ffmpeg no PATH")
+    subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-framerate", str(fps),
+                    "-i", os.path.join(frames_dir, FRAME_PATTERN),
+                    "-c:v", "libx264", "-pix_fmt", "yuv420p", out_path], check=True)
+
+def render_replay(path: str, out: str, spec: RenderSpec,
+                  workers: Optional[int] = None) -> int:
+    """`out` terminado em .gif/.mp4 gera o vídeo; caso contrário, um diretório de PNGs."""
+    ext = os.path.splitext(out)[1].lower()
+    if ext not in (".gif", ".mp4"):
+        return render_frames(path, spec, out, workers)
+    if ext == ".mp4" and shutil.which("ffmpeg") is None:
+        raise RuntimeError("saída .mp4 requer o ffmpeg no PATH")
+    with tempfile.TemporaryDirectory(prefix="render_") as tmp:
+        count = render_frames(path, spec, tmp, workers)
+        if ext == ".gif":
+            encode_gif(tmp, count, spec.fps, out)
+        else:
+            encode_mp4(tmp, spec.fps, out)
+    return count
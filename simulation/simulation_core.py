@@ -1,13 +1,22 @@
 from __future__ import annotations
-import time, math
+import time, math, hashlib, heapq
 from dataclasses import dataclass, field
-from typing import Optional, Literal, Dict, List, Tuple, Set
+from typing import Optional, Literal, Dict, List, Tuple
 from .models import DataSimulation, EventGeneric, EventMove, EventMsg
 from .mapping import MAPPINGS, DEFAULT_MAPPING_KEY, _rgb_to_hex
+from .spatial import SpatialGrid, cluster_nodes
+from .tracks import TrackCache
+from .intervals import IntervalIndex
+from .traffic import TrafficCounters
+from .stats import StatsResult, StatsWorker, compute_stats
 
 Mode = Literal["PLAY", "PAUSE", "BACK"]
-ANIM_MSG_DURATION = 0.8  # segundos
-TRACK_MAX = 80
+Viewport = Tuple[float, float, float, float]  # x0, y0, x1, y1 (mundo)
+ANIM_MSG_DURATION = 0.8  # segundos (tempo simulado de cada transmissão)
+PACKETS_MAX = 100         # acima disso, transmissões ativas são agregadas por origem
+TRACK_WINDOW = 30.0       # janela (tempo simulado) das trilhas de UAV/INTRUDER
+CLUSTER_CELL_PX = 24      # lado (px na tela) da célula de agrupamento
+CLUSTER_MIN_NODES = 300   # só agrupa quando há muitos nós visíveis
 
 @dataclass
 class SimulationController:
@@ -19,16 +28,27 @@ class SimulationController:
     time_sim:float=0.0
     anim_phase:float=0.0             # 0..1 para animar pacotes
     mapping_key: str = DEFAULT_MAPPING_KEY
+    track_window: float = TRACK_WINDOW
 
     events_total: int = 0
     moves_applied: int = 0
     msgs_started: int = 0
     msgs_completed: int = 0
+    _consumed: int = 0                # eventos cujos efeitos já foram aplicados (marca d'água)
 
-    _stats_cache: Dict = field(default_factory=dict)
+    _stats: StatsWorker = field(default_factory=StatsWorker, repr=False)
     _stats_last_wall: float = field(default_factory=lambda: 0.0)
     _stats_throttle_sec: float = 0.5  # recalcular no máx. 2x/s
 
+    _pos_version: int = 0             # incrementa a cada EventMove aplicado
+    _grid: Optional[SpatialGrid] = None   # atualizada nó a nó a cada EventMove
+    _degrees_cache: Dict[int, int] = field(default_factory=dict)
+    _degrees_res: Optional[StatsResult] = None   # resultado de onde saiu _degrees_cache
+    _tracks: Dict[int, TrackCache] = field(default_factory=dict)
+    _msg_index: IntervalIndex = field(default_factory=IntervalIndex)
+    traffic: TrafficCounters = field(default_factory=TrafficCounters)
+    _msg_ends: List[float] = field(default_factory=list)  # heap: fim das transmissões em curso
+
     def init(self, data:DataSimulation)->None:
         self.data=data
         self.mode="PAUSE"
@@ -42,8 +62,18 @@ class SimulationController:
         self.moves_applied = 0
         self.msgs_started = 0
         self.msgs_completed = 0
-        self._stats_cache = {}
+        self._consumed = 0
+        self.traffic = TrafficCounters()
+        self._msg_ends = []
+        self._stats.reset()
         self._stats_last_wall = 0.0
+        self._pos_version += 1
+        self._grid = None
+        self._tracks = {}
+        # [time, time + duração] de cada EventMsg -> transmissões concorrentes
+        self._msg_index = IntervalIndex.build(
+            (ev.time, ev.time + ANIM_MSG_DURATION, ev)
+            for ev in data.events if isinstance(ev, EventMsg))
 
     def play(self)->None: 
         self.mode="PLAY"
@@ -55,24 +85,63 @@ class SimulationController:
         self.mode="BACK"
 
     def step_forward(self) -> None:
-        if not self.data:
+        if not self.data or not self.data.events:
+            return
+        if self.idx >= len(self.data.events):
+            # já consumimos o último
+            self.mode = "PAUSE"
             return
         ev = self.data.events[self.idx]
         self.time_sim = ev.time
-        if self.idx + 1 < len(self.data.events):
+        self._consume(ev)
+        self.idx += 1
+        self._complete_msgs()
+        self.anim_phase = 0.0
+
+    def _consume(self, ev: EventGeneric) -> None:
+        """
+        Aplica o evento events[idx] alcançado pelo relógio (movimentos / início
+        de mensagem). step_back só recua idx: ao avançar de novo, eventos já
+        aplicados não são reaplicados (contadores, tráfego e trilhas intactos).
+        """
+        if self.idx < self._consumed:
+            return
+        self._consumed = self.idx + 1
+        if isinstance(ev, EventMove):
+            # como ev.run(), mas levando cada nó movido para a sua nova célula
+            for mv in ev.moves:
+                ox, oy = mv.node.x, mv.node.y
+                mv.apply()
+                if self._grid is not None:
+                    self._grid.move(mv.node, ox, oy)
+            self.moves_applied += len(ev.moves)
+            self._pos_version += 1
+        elif isinstance(ev, EventMsg):
+            self.msgs_started += 1
+            self.traffic.record(ev, ev.time)
+            heapq.heappush(self._msg_ends, ev.time + ANIM_MSG_DURATION)
+
+    def _complete_msgs(self) -> None:
+        """Conta como concluídas as transmissões cujo intervalo já terminou."""
+        while self._msg_ends and self._msg_ends[0] <= self.time_sim:
+            heapq.heappop(self._msg_ends)
+            self.msgs_completed += 1
+
+    def advance_to(self, t: float) -> List[tuple]:
+        """
+        Leva o relógio a t (>= atual), consumindo todos os eventos já
+        alcançados. Devolve as transmissões ativas em t.
+        """
+        events = self.data.events
+        self.time_sim = t
+        while self.idx < len(events) and events[self.idx].time <= t:
+            self._consume(events[self.idx])
             self.idx += 1
-            self.anim_phase = 0.0
-            # se for EventMsg, a animação começará do 0.0 normalmente
-        else:
-            # já estamos no último
-            self.idx = len(self.data.events) - 1
-            self.mode = "PAUSE"
-            # se o último for EventMsg e você quiser “congelar” a onda completa manualmente:
-            last = self._current_event()
-            if isinstance(last, EventMsg):
-                self.anim_phase = 1.0
-            else:
-                self.anim_phase = 0.0
+        self._complete_msgs()
+        # Fase da transmissão mais recente (compatível com o antigo `packet`)
+        active = self._msg_index.at(t)
+        self.anim_phase = self._phase(active[-1]) if active else 0.0
+        return active
 
     def step_back(self)->None:
         if not self.data: 
@@ -80,119 +149,75 @@ class SimulationController:
         self.idx = max(self.idx - 1, 0)
         self.anim_phase = 0.0
 
-    def _current_event(self):
-        if not self.data or not self.data.events: 
-            return None
-        i = max(0, min(self.idx, len(self.data.events)-1))
-        return self.data.events[i]
+    # ----------------- Transmissões ativas -----------------
+    def _phase(self, item) -> float:
+        """Fase 0..1 da transmissão [início, fim] no instante atual."""
+        start, end, _ = item
+        if end <= start:
+            return 1.0
+        return max(0.0, min(1.0, (self.time_sim - start) / (end - start)))
+
+    def _packets_out(self, active) -> List[dict]:
+        """
+        Serializa as transmissões ativas. Acima de PACKETS_MAX, agrega por nó
+        de origem (contagem, destinos unidos, fase da mais recente).
+        """
+        if len(active) <= PACKETS_MAX:
+            out = []
+            for it in active:
+                ev = it[2]
+                out.append({
+                    "source": ev.source.node_id,
+                    "x": ev.source.x, "y": ev.source.y,
+                    "dests": [d.node_id for d in ev.destinations],
+                    "phase": self._phase(it),
+                    "count": 1,
+                })
+            return out
+        by_src: Dict[int, dict] = {}
+        for it in active:  # em ordem de início: a última define a fase
+            ev = it[2]
+            agg = by_src.setdefault(ev.source.node_id, {
+                "source": ev.source.node_id,
+                "x": ev.source.x, "y": ev.source.y,
+                "dests": set(), "phase": 0.0, "count": 0,
+            })
+            agg["dests"].update(d.node_id for d in ev.destinations)
+            agg["phase"] = self._phase(it)
+            agg["count"] += 1
+        top = sorted(by_src.values(), key=lambda a: a["count"], reverse=True)[:PACKETS_MAX]
+        for agg in top:
+            agg["dests"] = sorted(agg["dests"])
+        return top
     
-    # ----------------- Estatísticas rápidas -----------------
-    def _compute_stats(self) -> Dict:
-        """Computa grau médio/máximo, histograma de graus e componentes."""
-        if not self.data or not self.data.nodes:
-            return {
-                "nodes": 0, "avg_degree": 0.0, "max_degree": 0,
-                "degree_hist": [], "components": 0,
-                "msgs_started": self.msgs_started,
-                "msgs_completed": self.msgs_completed,
-                "packet_rate": 0.0,  # simples (com base no tempo simulado)
-            }
-
-        nodes = self.data.nodes
+    # ----------------- Estatísticas (worker) -----------------
+    def _request_stats(self, now: float) -> None:
+        """Agenda o cálculo das stats para as posições atuais, sem esperar por ele."""
+        last = self._stats.latest()
+        if last is not None and last.pos_version == self._pos_version:
+            return  # posições não mudaram desde o último resultado
+        if (now - self._stats_last_wall) < self._stats_throttle_sec:
+            return
+        positions = tuple((n.x, n.y) for n in self.data.nodes)  # retrato imutável
         R = float(self.data.radius_communication or 0.0)
-        if R <= 0.0:
-            # sem raio, graus = 0 e cada nó vira um componente
-            n = len(nodes)
-            return {
-                "nodes": n, "avg_degree": 0.0, "max_degree": 0,
-                "degree_hist": [(0, n)], "components": n,
-                "msgs_started": self.msgs_started,
-                "msgs_completed": self.msgs_completed,
-                "packet_rate": (self.msgs_completed / max(self.time_sim, 1e-9)),
-            }
-
-        # ----- Grade espacial para vizinhança O(n) -----
-        cell = max(R, 1.0)
-        buckets: Dict[Tuple[int,int], List[int]] = {}
-        xs = [n.x for n in nodes]; ys = [n.y for n in nodes]
-        for idx, n in enumerate(nodes):
-            ix = int(math.floor(n.x / cell))
-            iy = int(math.floor(n.y / cell))
-            buckets.setdefault((ix, iy), []).append(idx)
-
-        def neighbors(idx: int) -> List[int]:
-            n = nodes[idx]
-            ix = int(math.floor(n.x / cell))
-            iy = int(math.floor(n.y / cell))
-            out: List[int] = []
-            for dx in (-1,0,1):
-                for dy in (-1,0,1):
-                    key = (ix+dx, iy+dy)
-                    if key not in buckets: continue
-                    for j in buckets[key]:
-                        if j == idx: continue
-                        m = nodes[j]
-                        if (n.x-m.x)**2 + (n.y-m.y)**2 <= R*R:
-                            out.append(j)
-            return out
-
-        # Graus
-        degs: List[int] = []
-        nbrs_cache: List[List[int]] = []
-        for i in range(len(nodes)):
-            nb = neighbors(i)
-            nbrs_cache.append(nb)
-            degs.append(len(nb))
-
-        n = len(nodes)
-        avg_deg = sum(degs) / n
-        max_deg = max(degs) if degs else 0
-
-        # Histograma de graus (0..max_deg)
-        hist: List[Tuple[int,int]] = []
-        if max_deg <= 12:
-            # bins exatos de 0..max_deg
-            for k in range(max_deg+1):
-                hist.append((k, sum(1 for d in degs if d == k)))
-        else:
-            # binning grosso (ex.: 12 bins)
-            bins = 12
-            step = max(1, math.ceil(max_deg / bins))
-            k = 0
-            while k <= max_deg:
-                cnt = sum(1 for d in degs if k <= d < k+step)
-                hist.append((k, cnt))
-                k += step
-
-        # Componentes (BFS usando vizinhos da cache)
-        seen: Set[int] = set()
-        comps = 0
-        for i in range(n):
-            if i in seen: continue
-            comps += 1
-            stack = [i]
-            seen.add(i)
-            while stack:
-                u = stack.pop()
-                for v in nbrs_cache[u]:
-                    if v not in seen:
-                        seen.add(v)
-                        stack.append(v)
+        if self._stats.submit(positions, R, self._pos_version, self.time_sim):
+            self._stats_last_wall = now
 
+    def _stats_out(self, res: Optional[StatsResult]) -> Dict:
+        """Resultado publicado `res` + contadores de mensagens (sempre atuais)."""
+        out = dict(res.stats) if res else compute_stats((), 0.0)
+        out.pop("degrees")  # por nó: só para o mapping
+        out["msgs_started"] = self.msgs_started
+        out["msgs_completed"] = self.msgs_completed
         # taxa de pacotes concluídos por unidade de tempo simulado
-        pkt_rate = (self.msgs_completed / max(self.time_sim, 1e-9))
-
-        return {
-            "nodes": n,
-            "avg_degree": avg_deg,
-            "max_degree": max_deg,
-            "degree_hist": hist,     # lista de (grau/bin_inicial, contagem)
-            "components": comps,
-            "msgs_started": self.msgs_started,
-            "msgs_completed": self.msgs_completed,
-            "packet_rate": pkt_rate,
+        out["packet_rate"] = self.msgs_completed / max(self.time_sim, 1e-9)
+        out["age"] = {
+            "computed_at": res.computed_at if res else None,   # epoch do cálculo
+            "sim": (self.time_sim - res.time_sim) if res else None,  # atraso em tempo simulado
+            "stale": res is None or res.pos_version != self._pos_version,
         }
-    
+        return out
+
     def tick(self) -> None:
         if not self.data:
             return
@@ -200,6 +225,7 @@ class SimulationController:
         now = time.time()
         elapsed = now - self.last_tick
         self.last_tick = now
+        self._request_stats(now)
 
         if self.mode not in ("PLAY", "BACK"):
             return
@@ -216,71 +242,145 @@ class SimulationController:
         # PLAY: avança o relógio simulado
         self.time_sim += elapsed / speed_div
 
-        # --------- ESTE É O PONTO-CHAVE: processar EventMove ---------
-        ev = self._current_event()
-        if ev is None:
+        events = self.data.events
+        if not events:
             self.mode = "PAUSE"
             self.idx = 0
             self.anim_phase = 0.0
             return
 
-        # Consome em sequência todos os EventMove (aplica e avança)
-        while isinstance(ev, EventMove):
-            # aplique os movimentos desse evento (usa sua API real)
-            ev.run()  # dentro dele já faz mv.apply() para cada Move(x,y)
-            self.moves_applied += len(ev.moves)
-            # avança para o próximo evento (ou pausa no fim)
-            if self.idx + 1 < len(self.data.events):
-                self.idx += 1
-                ev = self._current_event()
-                continue
-            else:
-                self.mode = "PAUSE"
-                return
-        # --------------------------------------------------------------
-
-        # A partir daqui, se não era EventMove, tratamos EventMsg (animação)
-        if isinstance(ev, EventMsg):
-            # contou início (apenas na primeira vez da animação)
-            if self.anim_phase == 0.0:
-                self.msgs_started += 1
-            self.anim_phase += elapsed / speed_div / ANIM_MSG_DURATION
-            if self.anim_phase >= 1.0:
-                if self.idx + 1 < len(self.data.events):
-                    self.idx += 1
-                    self.anim_phase = 0.0
-                else:
-                    self.anim_phase = 1.0
-                    self.mode = "PAUSE"
-        # Outros tipos (se existirem) ficam parados até próximo tick ou step
-
-        # Atualiza cache de stats com throttle
-        if (now - self._stats_last_wall) >= self._stats_throttle_sec:
-            self._stats_cache = self._compute_stats()
-            self._stats_last_wall = now
+        # Trechos ociosos (nenhuma transmissão ativa) saltam direto ao próximo evento
+        if (self.idx < len(events) and events[self.idx].time > self.time_sim
+                and not self._msg_index.any_at(self.time_sim)):
+            self.time_sim = events[self.idx].time
+
+        active = self.advance_to(self.time_sim)
+        if self.idx >= len(events) and not active:
+            self.mode = "PAUSE"
 
     def set_mapping(self, key: str) -> None:
         if key in MAPPINGS:
             self.mapping_key = key
 
-    def snapshot(self) -> dict:
+    def frame_version(self) -> str:
+        """
+        Identificador do quadro atual: muda sempre que algo que aparece no
+        snapshot muda (pausado, permanece igual entre requisições).
+        """
+        key = (self._pos_version, self._stats.published, self.mode, self.idx,
+               self.time_sim, self.anim_phase, self.speed, self.mapping_key,
+               self.track_window)
+        return hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+
+    def traffic_summary(self, top: int) -> dict:
+        """Enlaces mais ativos e totais por nó (contadores de tráfego)."""
+        tr = self.traffic
+        return {
+            "time": self.time_sim,
+            "links": tr.top_links(top, self.time_sim),
+            "nodes": [{"id": nid,
+                       "sent": tr.sent.get(nid, 0),
+                       "received": tr.received.get(nid, 0),
+                       "fanout": tr.fanout.get(nid, 0),
+                       "rate": tr.node_rate(nid, self.time_sim),
+                       "sent_rate": tr.node_rate(nid, self.time_sim, "sent"),
+                       "received_rate": tr.node_rate(nid, self.time_sim, "received"),
+                       "fanout_rate": tr.node_rate(nid, self.time_sim, "fanout")}
+                      for nid in sorted(set(tr.sent) | set(tr.received))],
+        }
+
+    # ----------------- Índice espacial -----------------
+    def _spatial_index(self) -> SpatialGrid:
+        """Grade dos nós, criada na primeira consulta e mantida por _consume."""
+        if self._grid is None:
+            nodes = self.data.nodes if self.data else []
+            R = float(self.data.radius_communication or 0.0) if self.data else 0.0
+            if R > 0:
+                cell = R
+            elif nodes:
+                xs = [n.x for n in nodes]; ys = [n.y for n in nodes]
+                area = max(1.0, (max(xs) - min(xs)) * (max(ys) - min(ys)))
+                cell = math.sqrt(area / len(nodes))
+            else:
+                cell = 1.0
+            self._grid = SpatialGrid.build(nodes, max(cell, 1.0))
+        return self._grid
+
+    def _degrees(self, res: Optional[StatsResult]) -> Dict[int, int]:
+        """Grau por nó do resultado publicado pelo worker (montado uma vez por resultado)."""
+        if res is None:
+            return {}
+        if self._degrees_res is not res:
+            ids = (n.node_id for n in self.data.nodes)  # mesma ordem das posições enviadas
+            self._degrees_cache = dict(zip(ids, res.stats["degrees"]))
+            self._degrees_res = res
+        return self._degrees_cache
+
+    # ----------------- Consultas espaciais -----------------
+    @staticmethod
+    def _node_brief(n, dist: Optional[float] = None) -> dict:
+        out = {"id": n.node_id, "x": n.x, "y": n.y, "type": n.node_type_str}
+        if dist is not None:
+            out["dist"] = dist
+        return out
+
+    def node_at(self, x: float, y: float, tol: float) -> Optional[dict]:
+        """Nó mais próximo de (x, y) dentro da tolerância (mundo)."""
         if not self.data:
-            return {"nodes": [], "mode": self.mode, "idx": 0, "time": 0.0}
+            return None
+        n = self._spatial_index().nearest(x, y, tol)
+        return self._node_brief(n, math.hypot(n.x - x, n.y - y)) if n else None
+
+    def neighbors_of(self, node_id: int, radius: Optional[float] = None) -> Optional[List[dict]]:
+        """Vizinhos dentro de `radius` (padrão: raio de comunicação); None se o nó não existe."""
+        node = self.data.get_node(node_id) if self.data else None
+        if node is None:
+            return None
+        R = float(self.data.radius_communication or 0.0) if radius is None else radius
+        out = [self._node_brief(m, math.hypot(m.x - node.x, m.y - node.y))
+               for m in self._spatial_index().within(node.x, node.y, R)
+               if m.node_id != node_id]
+        out.sort(key=lambda d: d["dist"])
+        return out
+
+    def knn_of(self, node_id: int, k: int) -> Optional[List[dict]]:
+        """Os k vizinhos mais próximos do nó; None se o nó não existe."""
+        node = self.data.get_node(node_id) if self.data else None
+        if node is None:
+            return None
+        found = self._spatial_index().knn(node.x, node.y, k, exclude=node_id)
+        return [self._node_brief(m, d) for d, m in found]
+
+    def nodes_in_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[dict]:
+        if not self.data:
+            return []
+        return [self._node_brief(n) for n in self._spatial_index().query_rect(x0, y0, x1, y1)]
+
+    def _visible_nodes(self, viewport: Optional[Viewport], scale: Optional[float]):
+        """Nós dentro do viewport e, no zoom distante, clusters das regiões densas."""
+        if viewport is None:
+            return list(self.data.nodes), []
+        visible = self._spatial_index().query_rect(*viewport)
+        if scale and scale > 0 and len(visible) > CLUSTER_MIN_NODES:
+            return cluster_nodes(visible, CLUSTER_CELL_PX / scale)
+        return visible, []
+
+    def snapshot(self, viewport: Optional[Viewport] = None,
+                 scale: Optional[float] = None,
+                 selected: Optional[int] = None) -> dict:
+        """
+        Estado atual para o cliente. Com `viewport` (retângulo no mundo) só
+        os nós visíveis são enviados; com `scale` (px por unidade) regiões
+        densas viram clusters. `selected` é sempre incluído, se existir.
+        """
+        if not self.data:
+            return {"nodes": [], "clusters": [], "mode": self.mode, "idx": 0, "time": 0.0}
         
-        # acrescente um pré-cálculo: grau máximo (para MappingByDegree)
-        R = float(self.data.radius_communication or 0.0)
-        degree_max = 1
-        if R > 0 and self.data.nodes:
-            degs = []
-            for a in self.data.nodes:
-                d = 0
-                for b in self.data.nodes:
-                    if b.node_id == a.node_id: 
-                        continue
-                    if ((a.x-b.x)**2 + (a.y-b.y)**2) ** 0.5 <= R:
-                        d += 1
-                degs.append(d)
-            degree_max = max(1, max(degs))
+        # graus vêm do worker de stats (nunca calculados aqui); podem estar atrasados
+        res = self._stats.latest()
+        stale = res is None or res.pos_version != self._pos_version
+        degrees = self._degrees(res) if self.mapping_key == "by_degree" else {}
+        degree_max = max(1, res.stats["max_degree"]) if res else 1
 
         # --- Metadados ---
         w = int(self.data.dimension_x or 0)
@@ -313,18 +413,29 @@ class SimulationController:
             "simtime_max": float(self.data.time_simulation_max or 0.0),
             "density": density,
             "_degree_max": degree_max,  # <-- para o mapping
+            "_degrees_stale": stale,
         }
 
+        # === nós visíveis (viewport) e clusters ===
+        visible, clusters = self._visible_nodes(viewport, scale)
+        if selected is not None and all(n.node_id != selected for n in visible):
+            sel = self.data.get_node(selected)
+            if sel is not None:
+                visible.append(sel)
+
         # === cores por nó ===
         mapper = MAPPINGS.get(self.mapping_key)
+        # contexto do mapping: meta + dados pré-calculados que não vão no JSON
+        ctx = dict(meta, _degrees=degrees, _traffic=self.traffic)
         # usamos os objetos Node vivos (self.data.nodes)
         nodes_out = []
-        for n in self.data.nodes:
-            rgb = mapper.color_of(n, self.data.nodes, meta) if mapper else (200, 200, 200)
+        for n in visible:
+            rgb = mapper.color_of(n, self.data.nodes, ctx) if mapper else (200, 200, 200)
             # Trilhas somente para UAV/INTRUDER
             tp = (n.node_type_str or "REGULAR").upper()
             if tp in ("UAV", "INTRUDER") and n.track:
-                track_slice = n.track[-TRACK_MAX:]
+                cache = self._tracks.setdefault(n.node_id, TrackCache())
+                track_slice = cache.simplified(n.track, scale or 1.0, self.track_window)
                 track_out = [{"x": p.x, "y": p.y} for p in track_slice]
             else:
                 track_out = []
@@ -342,19 +453,30 @@ class SimulationController:
 
         total = len(self.data.events)
 
-        packet = None
-        ev = self._current_event()
-        if isinstance(ev, EventMsg) and self.mode == "PLAY":
-            packet = {
-                "source": ev.source.node_id,
-                "dests": [d.node_id for d in ev.destinations],
-                "phase": self.anim_phase,  # 1.0 quando pausado no fim
-            }
+        # transmissões ativas em time_sim (todas as concorrentes)
+        packets: List[dict] = []
+        packets_total = 0
+        if self.mode == "PLAY":
+            active = self._msg_index.at(self.time_sim)
+            if viewport is not None:
+                x0, y0, x1, y1 = viewport
+                active = [it for it in active
+                          if x0 <= it[2].source.x <= x1 and y0 <= it[2].source.y <= y1]
+            packets_total = len(active)
+            packets = self._packets_out(active)
+        packet = packets[-1] if packets else None  # compatibilidade (uma só)
         # legenda do mapping atual
-        legend = mapper.legend(self.data.nodes, meta) if mapper else {"type": "none", "title": "Cores"}
-        stats = self._stats_cache or self._compute_stats()
+        legend = mapper.legend(self.data.nodes, ctx) if mapper else {"type": "none", "title": "Cores"}
+        stats = self._stats_out(res)
+        # nó selecionado: vizinhos via índice (o cliente não precisa varrer)
+        selected_out = None
+        if selected is not None:
+            neigh = self.neighbors_of(selected)
+            if neigh is not None:
+                selected_out = {"id": selected, "neighbors": neigh}
         return {
             "nodes": nodes_out,
+            "clusters": clusters,
             "mode": self.mode,
             "idx": self.idx,
             "total": total,
@@ -363,9 +485,12 @@ class SimulationController:
             "dim": {"x": self.data.dimension_x, "y": self.data.dimension_y},
             "radius_comm": self.data.radius_communication,
             "packet": packet,
+            "packets": packets,
+            "packets_total": packets_total,
             "meta": meta,
             "mapping": {"key": self.mapping_key, "legend": legend},
             "stats": stats,
+            "selected": selected_out,
         }
 
     def close(self):
@@ -380,5 +505,11 @@ class SimulationController:
         self.moves_applied = 0
         self.msgs_started = 0
         self.msgs_completed = 0
-        self._stats_cache = {}
-        self._stats_last_wall = 0.0
\ No newline at end of file
+        self._consumed = 0
+        self.traffic = TrafficCounters()
+        self._msg_ends = []
+        self._stats.reset()
+        self._stats_last_wall = 0.0
+        self._pos_version += 1
+        self._grid = None
+        self._tracks = {}
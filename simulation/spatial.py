@@ -0,0 +1,167 @@
+# simulation/spatial.py
+from __future__ import annotations
+import math
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from .models import Node
+
+Cell = Tuple[int, int]
+
+# ==============================================================
+# GRADE ESPACIAL (índice uniforme de nós por célula)
+# ==============================================================
+@dataclass
+class SpatialGrid:
+    """Índice em grade uniforme: cada célula guarda os nós que caem nela."""
+    cell: float = 1.0
+    buckets: Dict[Cell, List[Node]] = field(default_factory=dict)
+    count: int = 0
+    bounds: Tuple[int, int, int, int] = (0, 0, 0, 0)  # ix0, iy0, ix1, iy1 ocupados
+
+    @classmethod
+    def build(cls, nodes: Iterable[Node], cell: float) -> 'SpatialGrid':
+        grid = cls(cell=max(float(cell), 1e-6))
+        for n in nodes:
+            grid.buckets.setdefault(grid.cell_of(n.x, n.y), []).append(n)
+            grid.count += 1
+        if grid.buckets:
+            ixs = [k[0] for k in grid.buckets]; iys = [k[1] for k in grid.buckets]
+            grid.bounds = (min(ixs), min(iys), max(ixs), max(iys))
+        return grid
+
+    def cell_of(self, x: float, y: float) -> Cell:
+        return (int(math.floor(x / self.cell)), int(math.floor(y / self.cell)))
+
+    def move(self, node: Node, old_x: float, old_y: float) -> None:
+        """Leva o nó, que estava em (old_x, old_y), para a célula da posição atual."""
+        old, new = self.cell_of(old_x, old_y), self.cell_of(node.x, node.y)
+        if old == new:
+            return
+        bucket = self.buckets.get(old, [])
+        for i, m in enumerate(bucket):
+            if m is node:
+                del bucket[i]
+                break
+        if not bucket:
+            self.buckets.pop(old, None)
+        self.buckets.setdefault(new, []).append(node)
+        # bounds só cresce: continua cobrindo todas as células ocupadas
+        ix0, iy0, ix1, iy1 = self.bounds
+        self.bounds = (min(ix0, new[0]), min(iy0, new[1]), max(ix1, new[0]), max(iy1, new[1]))
+
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[Node]:
+        """Nós dentro do retângulo [x0,x1] x [y0,y1] (coordenadas do mundo)."""
+        if x0 > x1: x0, x1 = x1, x0
+        if y0 > y1: y0, y1 = y1, y0
+        ix0, iy0 = self.cell_of(x0, y0)
+        ix1, iy1 = self.cell_of(x1, y1)
+        out: List[Node] = []
+        # retângulo maior que a rede: percorre só as células ocupadas
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) > len(self.buckets):
+            cells = [k for k in self.buckets
+                     if ix0 <= k[0] <= ix1 and iy0 <= k[1] <= iy1]
+        else:
+            cells = [(ix, iy) for ix in range(ix0, ix1 + 1)
+                              for iy in range(iy0, iy1 + 1)]
+        for key in cells:
+            for n in self.buckets.get(key, ()):
+                if x0 <= n.x <= x1 and y0 <= n.y <= y1:
+                    out.append(n)
+        return out
+
+    def within(self, x: float, y: float, r: float) -> List[Node]:
+        """Nós a uma distância <= r do ponto (x, y)."""
+        r2 = r * r
+        return [n for n in self.query_rect(x - r, y - r, x + r, y + r)
+                if (n.x - x) ** 2 + (n.y - y) ** 2 <= r2]
+
+    def _ring(self, ix: int, iy: int, r: int) -> List[Cell]:
+        """Células a distância de Chebyshev exatamente r de (ix, iy)."""
+        if r == 0:
+            return [(ix, iy)]
+        cells = [(ix + d, iy - r) for d in range(-r, r + 1)]
+        cells += [(ix + d, iy + r) for d in range(-r, r + 1)]
+        cells += [(ix - r, iy + d) for d in range(-r + 1, r)]
+        cells += [(ix + r, iy + d) for d in range(-r + 1, r)]
+        return cells
+
+    def knn(self, x: float, y: float, k: int,
+            exclude: Optional[int] = None) -> List[Tuple[float, Node]]:
+        """
+        Os k nós mais próximos de (x, y), como (distância, nó) em ordem
+        crescente. Busca em anéis de células a partir da célula do ponto e
+        para assim que nenhum anel restante pode conter algo mais próximo.
+        Quando os anéis ficam maiores que a rede (ponto isolado ou distante),
+        percorre de uma vez só as células ocupadas restantes.
+        """
+        if k <= 0 or not self.buckets:
+            return []
+        ix, iy = self.cell_of(x, y)
+        bx0, by0, bx1, by1 = self.bounds
+        r_max = max(ix - bx0, bx1 - ix, iy - by0, by1 - iy, 0)
+        heap: List[Tuple[float, int, Node]] = []  # max-heap por -d²
+
+        def visit(key: Cell) -> None:
+            for n in self.buckets.get(key, ()):
+                if n.node_id == exclude:
+                    continue
+                d2 = (n.x - x) ** 2 + (n.y - y) ** 2
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d2, n.node_id, n))
+                elif d2 < -heap[0][0]:
+                    heapq.heapreplace(heap, (-d2, n.node_id, n))
+
+        for r in range(r_max + 1):
+            if len(heap) == k:
+                reach = (r - 1) * self.cell
+                if reach > 0 and reach * reach > -heap[0][0]:
+                    break
+            if (2 * r + 1) ** 2 > len(self.buckets):
+                for key in self.buckets:
+                    if max(abs(key[0] - ix), abs(key[1] - iy)) >= r:
+                        visit(key)
+                break
+            for key in self._ring(ix, iy, r):
+                visit(key)
+        return [(math.sqrt(-d2), n) for d2, _, n in sorted(heap, reverse=True)]
+
+    def nearest(self, x: float, y: float,
+                max_dist: float = math.inf) -> Optional[Node]:
+        """Nó mais próximo de (x, y), se estiver a no máximo max_dist."""
+        if math.isfinite(max_dist):
+            best = None
+            for n in self.within(x, y, max_dist):
+                d2 = (n.x - x) ** 2 + (n.y - y) ** 2
+                if best is None or d2 < best[0]:
+                    best = (d2, n)
+            return best[1] if best else None
+        found = self.knn(x, y, 1)
+        return found[0][1] if found else None
+
+# ==============================================================
+# AGRUPAMENTO (clusters para zoom distante)
+# ==============================================================
+def cluster_nodes(nodes: List[Node], cell: float) -> Tuple[List[Node], List[Dict]]:
+    """
+    Agrupa nós em células de lado `cell` (mundo). Células com um único nó
+    continuam como nós; as demais viram um cluster com centróide e contagem.
+    """
+    cell = max(float(cell), 1e-6)
+    groups: Dict[Cell, List[Node]] = {}
+    for n in nodes:
+        key = (int(math.floor(n.x / cell)), int(math.floor(n.y / cell)))
+        groups.setdefault(key, []).append(n)
+    singles: List[Node] = []
+    clusters: List[Dict] = []
+    for members in groups.values():
+        if len(members) == 1:
+            singles.append(members[0])
+            continue
+        k = len(members)
+        clusters.append({
+            "x": sum(m.x for m in members) / k,
+            "y": sum(m.y for m in members) / k,
+            "count": k,
+        })
+    return singles, clusters
@@ -67,6 +67,7 @@ try {
 let lastState = null;
 
 let selectedNodeId = null;
+let pickedNode = null;  // nó do último clique, até o servidor incluí-lo no estado
 
 // CSS->px do canvas e conversões
 function getCanvasMouse(e) {
@@ -81,29 +82,21 @@ function screenToWorld(sx, sy) {
   return { x: view.x + sx / view.scale, y: view.y + sy / view.scale };
 }
 
-// Pick: pega o nó mais próximo dentro de um raio de clique em pixels
-function getNodeAt(state, sx, sy) {
-  if (!state || !state.nodes) return null;
-  let best = null, bestDist = Infinity;
+// Pick: pergunta ao servidor (índice espacial) o nó mais próximo dentro de
+// um raio de clique em pixels
+async function getNodeAt(sx, sy) {
   const pickR = Math.max(8, ui.nodeSize + 6); // tolerância de clique (px)
-  for (const n of state.nodes) {
-    const nx = worldToScreenX(n.x);
-    const ny = worldToScreenY(n.y);
-    const d = Math.hypot(nx - sx, ny - sy);
-    if (d < bestDist && d <= pickR) { best = n; bestDist = d; }
-  }
-  return best; // {id, x, y, type, ...} ou null
+  const { x, y } = screenToWorld(sx, sy);
+  const params = new URLSearchParams({ x, y, tol: pickR / view.scale });
+  const res = await fetchJSON(`/api/nodes/nearest?${params}`);
+  return res.ok ? res.node : null; // {id, x, y, type, dist} ou null
 }
 
-function getNeighbors(state, node, radiusWorld) {
-  if (!state || !state.nodes || !node) return [];
-  const out = [];
-  for (const m of state.nodes) {
-    if (m.id === node.id) continue;
-    const d = Math.hypot(m.x - node.x, m.y - node.y);
-    if (d <= radiusWorld) out.push(m);
-  }
-  return out;
+// Vizinhos do nó selecionado, calculados no servidor (state.selected)
+function getNeighbors(state, node) {
+  const sel = state && state.selected;
+  if (!sel || !node || sel.id !== node.id) return [];
+  return sel.neighbors || [];
 }
 
 function setText(id, val) {
@@ -111,6 +104,13 @@ function setText(id, val) {
   if (e) e.textContent = val;
 }
 
+function findSelected(state) {
+  if (!state || !state.nodes || selectedNodeId == null) return null;
+  const node = state.nodes.find(n => n.id === selectedNodeId);
+  if (node) return node;
+  return (pickedNode && pickedNode.id === selectedNodeId) ? pickedNode : null;
+}
+
 function updateSelectedInfo(state) {
   const el = (id) => document.getElementById(id);
   if (!selectedNodeId || !state) {
@@ -122,10 +122,10 @@ function updateSelectedInfo(state) {
     setText("sel-neigh", "—");
     return;
   }
-  const node = state.nodes.find(n => n.id === selectedNodeId);
+  const node = findSelected(state);
   if (!node) { selectedNodeId = null; updateSelectedInfo(state); return; }
   const r = state.radius_comm || 0;
-  const neigh = getNeighbors(state, node, r);
+  const neigh = getNeighbors(state, node);
 
   setText("sel-id", String(node.id));
   setText("sel-type", (node.type || "REGULAR"));
@@ -154,15 +154,53 @@ function fetchJSON(url, opts = {}) {
   return fetch(url, opts).then(r => r.json());
 }
 
+// --- Upload em partes (retomável) para arquivos grandes ---
+const CHUNKED_UPLOAD_MIN = 16 * 1024 * 1024;  // acima disso, envia em partes
+const UPLOAD_CHUNK = 8 * 1024 * 1024;
+const UPLOAD_RETRIES = 5;
+
+async function uploadChunked(file) {
+  const post = (url, body, headers = {}) => fetchJSON(url, {
+    method: "POST",
+    headers: { "X-CSRFToken": getCSRF(), ...headers },
+    body,
+  });
+  const start = await post("/api/upload/start",
+    new URLSearchParams({ name: file.name, size: String(file.size) }));
+  if (!start.ok) return start;
+  const id = encodeURIComponent(start.upload_id);
+  let offset = 0, failures = 0;
+  while (offset < file.size) {
+    try {
+      const res = await post(`/api/upload/chunk?upload_id=${id}&offset=${offset}`,
+        file.slice(offset, offset + UPLOAD_CHUNK),
+        { "Content-Type": "application/octet-stream" });
+      if (typeof res.offset === "number") offset = res.offset;  // 409 também informa
+      else if (!res.ok) return res;
+      failures = 0;
+    } catch (_) {
+      // falha de rede: pergunta ao servidor quanto já chegou e retoma dali
+      if (++failures > UPLOAD_RETRIES) return { ok: false, error: "Falha de rede no upload" };
+      await new Promise(r => setTimeout(r, 500 * failures));
+      const st = await fetchJSON(`/api/upload/status?upload_id=${id}`).catch(() => null);
+      if (st && st.ok) offset = st.offset;
+    }
+  }
+  return post(`/api/upload/finish?upload_id=${id}`);
+}
+
 // --- Upload com CSRF ---
 document.getElementById("form-upload").addEventListener("submit", async (e) => {
   e.preventDefault();
   const fd = new FormData(e.target);
-  const res = await fetchJSON("/api/upload", {
-    method: "POST",
-    headers: { "X-CSRFToken": getCSRF() },
-    body: fd,
-  });
+  const file = fd.get("file");
+  const res = (file && file.size > CHUNKED_UPLOAD_MIN)
+    ? await uploadChunked(file)
+    : await fetchJSON("/api/upload", {
+        method: "POST",
+        headers: { "X-CSRFToken": getCSRF() },
+        body: fd,
+      });
   if (!res.ok) alert(res.error || "Falha no upload");
   // após sucesso no upload:
   didInitialFit = false;
@@ -198,6 +236,11 @@ document.querySelectorAll("button[data-act]").forEach(btn => {
 // ======================
 
 function getWorldBoundsFromState(state) {
+  // bbox de todos os nós calculado no servidor (state.nodes pode estar recortado)
+  const bb = state?.meta?.bbox;
+  if (bb && state.meta.nodes_count > 0) {
+    return { minX: bb.minX, minY: bb.minY, maxX: bb.minX + bb.width, maxY: bb.minY + bb.height };
+  }
   // Se houver nós, usa o bbox real deles
   if (state && Array.isArray(state.nodes) && state.nodes.length > 0) {
     let minX = +Infinity, minY = +Infinity, maxX = -Infinity, maxY = -Infinity;
@@ -372,62 +415,97 @@ function drawPacket(state) {
   ctx.restore();
 }
 
+// Transmissões ativas: o servidor manda todas as concorrentes em state.packets
+function activePackets(state) {
+  if (Array.isArray(state.packets)) return state.packets;
+  return state.packet ? [state.packet] : [];
+}
+
 function drawPacketSquare(state) {
-  const p = state.packet;
-  if (!p) return;
+  const packets = activePackets(state);
+  if (packets.length === 0) return;
   const nodesById = new Map(state.nodes.map(n => [n.id, n]));
-  const src = nodesById.get(p.source);
-  if (!src) return;
 
   const SIZE = 6;
-  const phase = Math.max(0, Math.min(1, p.phase ?? 0));
   ctx.save();
   ctx.fillStyle = "#0d6efd";
-  const sx = worldToScreenX(src.x), sy = worldToScreenY(src.y);
-  for (const did of p.dests) {
-    const d = nodesById.get(did);
-    if (!d) continue;
-    const dx = worldToScreenX(d.x), dy = worldToScreenY(d.y);
-    const x = sx * (1 - phase) + dx * phase;
-    const y = sy * (1 - phase) + dy * phase;
-    ctx.fillRect(Math.round(x - SIZE/2), Math.round(y - SIZE/2), SIZE, SIZE);
+  for (const p of packets) {
+    // origem pode estar fora de state.nodes (agrupada): usa x/y do pacote
+    const src = nodesById.get(p.source) || p;
+    const phase = Math.max(0, Math.min(1, p.phase ?? 0));
+    const sx = worldToScreenX(src.x), sy = worldToScreenY(src.y);
+    for (const did of p.dests) {
+      const d = nodesById.get(did);
+      if (!d) continue;
+      const dx = worldToScreenX(d.x), dy = worldToScreenY(d.y);
+      const x = sx * (1 - phase) + dx * phase;
+      const y = sy * (1 - phase) + dy * phase;
+      ctx.fillRect(Math.round(x - SIZE/2), Math.round(y - SIZE/2), SIZE, SIZE);
+    }
   }
   ctx.restore();
 }
 
 function drawPacketWave(state) {
-  const p = state.packet;
-  if (!p) return;
+  const packets = activePackets(state);
+  if (packets.length === 0) return;
   const nodesById = new Map(state.nodes.map(n => [n.id, n]));
-  const src = nodesById.get(p.source);
-  if (!src) return;
 
-  // fase 0..1 -> raio 0..radius_comm (mundo)
-  const phase = Math.max(0, Math.min(1, p.phase ?? 0));
-  const rWorld = phase * (state.radius_comm || 0);
-  const rPx = rWorld * view.scale;
+  ctx.save();
+  for (const p of packets) {
+    const src = nodesById.get(p.source) || p;
 
-  // centro na tela
-  const cx = worldToScreenX(src.x);
-  const cy = worldToScreenY(src.y);
+    // fase 0..1 -> raio 0..radius_comm (mundo)
+    const phase = Math.max(0, Math.min(1, p.phase ?? 0));
+    const rWorld = phase * (state.radius_comm || 0);
+    const rPx = rWorld * view.scale;
 
-  // círculo com alpha decrescente
-  const alpha = Math.max(0.1, 1 - phase);
-  ctx.save();
-  ctx.strokeStyle = `rgba(13,110,253,${alpha})`; // #0d6efd com alpha
-  ctx.lineWidth = Math.max(1, 2 * (1 - phase));
+    // centro na tela
+    const cx = worldToScreenX(src.x);
+    const cy = worldToScreenY(src.y);
 
-  ctx.beginPath();
-  ctx.arc(cx, cy, rPx, 0, 2 * Math.PI);
-  ctx.stroke();
+    // círculo com alpha decrescente; origens agregadas (count > 1) mais grossas
+    const alpha = Math.max(0.1, 1 - phase);
+    const extra = p.count > 1 ? Math.log2(p.count) : 0;
+    ctx.strokeStyle = `rgba(13,110,253,${alpha})`; // #0d6efd com alpha
+    ctx.lineWidth = Math.max(1, 2 * (1 - phase)) + extra;
 
-  // (opcional) 2ª frente mais fraca, tipo “onda dupla”
-  const r2 = Math.max(0, rPx - 0.25 * (state.radius_comm || 0) * view.scale);
-  if (r2 > 2) {
-    ctx.strokeStyle = `rgba(13,110,253,${alpha * 0.5})`;
     ctx.beginPath();
-    ctx.arc(cx, cy, r2, 0, 2 * Math.PI);
+    ctx.arc(cx, cy, rPx, 0, 2 * Math.PI);
     ctx.stroke();
+
+    // (opcional) 2ª frente mais fraca, tipo “onda dupla”
+    const r2 = Math.max(0, rPx - 0.25 * (state.radius_comm || 0) * view.scale);
+    if (r2 > 2) {
+      ctx.strokeStyle = `rgba(13,110,253,${alpha * 0.5})`;
+      ctx.beginPath();
+      ctx.arc(cx, cy, r2, 0, 2 * Math.PI);
+      ctx.stroke();
+    }
+  }
+  ctx.restore();
+}
+
+function drawClusters(state) {
+  const clusters = state.clusters;
+  if (!clusters || clusters.length === 0) return;
+  ctx.save();
+  ctx.textAlign = "center";
+  ctx.textBaseline = "middle";
+  ctx.font = "11px sans-serif";
+  for (const c of clusters) {
+    const x = worldToScreenX(c.x);
+    const y = worldToScreenY(c.y);
+    // raio cresce devagar com a contagem
+    const r = ui.nodeSize + 2 * Math.log2(c.count);
+    ctx.beginPath();
+    ctx.arc(x, y, r, 0, 2 * Math.PI);
+    ctx.fillStyle = "rgba(13,110,253,0.35)";
+    ctx.fill();
+    ctx.strokeStyle = "rgba(13,110,253,0.9)";
+    ctx.stroke();
+    ctx.fillStyle = "#000";
+    ctx.fillText(String(c.count), x, y);
   }
   ctx.restore();
 }
@@ -447,10 +525,10 @@ function draw(state) {
 
   // --- Destaques da seleção (raio + vizinhos/arestas) ---
   if (selectedNodeId) {
-    const node = state.nodes.find(n => n.id === selectedNodeId);
+    const node = findSelected(state);
     if (node) {
       const rWorld = state.radius_comm || 0;
-      const neigh = getNeighbors(state, node, rWorld);
+      const neigh = getNeighbors(state, node);
 
       // raio (mundo -> tela)
       const cx = worldToScreenX(node.x);
@@ -488,6 +566,9 @@ function draw(state) {
     }
   }
 
+  // clusters (zoom distante)
+  drawClusters(state);
+
   // nós
   ctx.font = "12px sans-serif";
   state.nodes.forEach(n => {
@@ -538,10 +619,35 @@ function resizeCanvasToDisplaySize() {
   }
 }
 
+// Query do /api/state: retângulo visível (mundo) + escala, para o servidor
+// recortar os nós e agrupar regiões densas
+function stateQuery() {
+  if (!didInitialFit) return "";
+  const pad = radiusComm || 0;  // margem p/ arestas que saem da tela
+  const params = new URLSearchParams({
+    x0: (view.x - pad).toFixed(2),
+    y0: (view.y - pad).toFixed(2),
+    x1: (view.x + canvas.width / view.scale + pad).toFixed(2),
+    y1: (view.y + canvas.height / view.scale + pad).toFixed(2),
+    scale: view.scale.toFixed(4),
+  });
+  if (selectedNodeId != null) params.set("sel", String(selectedNodeId));
+  return "?" + params.toString();
+}
+
+let lastEtag = null;
+
 async function poll() {
   try {
-    // cache-buster simples
-    const state = await fetchJSON('/api/state');
+    const askedSel = selectedNodeId;
+    // requisição condicional: quadro inalterado (ex.: pausado) volta 304
+    const headers = lastEtag ? { "If-None-Match": lastEtag } : {};
+    const resp = await fetch('/api/state' + stateQuery(), { headers, cache: "no-store" });
+    if (resp.status === 304) return;
+    const state = await resp.json();
+    lastEtag = resp.headers.get("ETag");
+    // o servidor já respondeu sobre a seleção: o nó do clique não é mais necessário
+    if (pickedNode && askedSel === pickedNode.id) pickedNode = null;
 
     // Atualiza dimensões declaradas (apenas informação; o fit usa bbox dos nós)
     if (state.dim) {
@@ -756,10 +862,12 @@ if (btnSavePng) {
 }
 
 // Clique: selecionar nó
-canvas.addEventListener("click", (e) => {
+canvas.addEventListener("click", async (e) => {
   if (!lastState) return;
   const { sx, sy } = getCanvasMouse(e);
-  const node = getNodeAt(lastState, sx, sy);
+  let node = null;
+  try { node = await getNodeAt(sx, sy); } catch (_) {}
+  pickedNode = node;
   selectedNodeId = node ? node.id : null;
   updateSelectedInfo(lastState);
   draw(lastState);
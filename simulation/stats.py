@@ -0,0 +1,155 @@
+# simulation/stats.py
+from __future__ import annotations
+import math
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+Positions = Sequence[Tuple[float, float]]  # (x, y) de cada nó, cópia imutável
+
+# ==============================================================
+# ESTATÍSTICAS DA TOPOLOGIA (função pura sobre um retrato das posições)
+# ==============================================================
+def compute_stats(positions: Positions, R: float) -> Dict:
+    """
+    Grau de cada nó (na ordem de `positions`), grau médio/máximo,
+    histograma de graus e componentes conexos.
+    """
+    n = len(positions)
+    if n == 0:
+        return {"nodes": 0, "avg_degree": 0.0, "max_degree": 0,
+                "degree_hist": [], "components": 0, "degrees": []}
+    if R <= 0.0:
+        # sem raio, graus = 0 e cada nó vira um componente
+        return {"nodes": n, "avg_degree": 0.0, "max_degree": 0,
+                "degree_hist": [(0, n)], "components": n, "degrees": [0] * n}
+
+    # ----- Grade espacial para vizinhança O(n) -----
+    cell = max(R, 1.0)
+    keys = [(int(math.floor(x / cell)), int(math.floor(y / cell))) for x, y in positions]
+    buckets: Dict[Tuple[int, int], List[int]] = {}
+    for i, key in enumerate(keys):
+        buckets.setdefault(key, []).append(i)
+
+    R2 = R * R
+    nbrs: List[List[int]] = []
+    for i, (x, y) in enumerate(positions):
+        ix, iy = keys[i]
+        out: List[int] = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in buckets.get((ix + dx, iy + dy), ()):
+                    if j == i: continue
+                    mx, my = positions[j]
+                    if (x - mx) ** 2 + (y - my) ** 2 <= R2:
+                        out.append(j)
+        nbrs.append(out)
+
+    # Graus
+    degs = [len(nb) for nb in nbrs]
+    avg_deg = sum(degs) / n
+    max_deg = max(degs)
+
+    # Histograma de graus (0..max_deg)
+    counts = [0] * (max_deg + 1)
+    for d in degs:
+        counts[d] += 1
+    if max_deg <= 12:
+        # bins exatos de 0..max_deg
+        hist = [(k, c) for k, c in enumerate(counts)]
+    else:
+        # binning grosso (ex.: 12 bins)
+        step = max(1, math.ceil(max_deg / 12))
+        hist = [(k, sum(counts[k:k + step])) for k in range(0, max_deg + 1, step)]
+
+    # Componentes (DFS usando as listas de vizinhos)
+    seen: Set[int] = set()
+    comps = 0
+    for i in range(n):
+        if i in seen: continue
+        comps += 1
+        stack = [i]
+        seen.add(i)
+        while stack:
+            u = stack.pop()
+            for v in nbrs[u]:
+                if v not in seen:
+                    seen.add(v)
+                    stack.append(v)
+
+    return {
+        "nodes": n,
+        "avg_degree": avg_deg,
+        "max_degree": max_deg,
+        "degree_hist": hist,     # lista de (grau/bin_inicial, contagem)
+        "components": comps,
+        "degrees": degs,         # por nó: usado pelo mapping by_degree, não vai ao cliente
+    }
+
+# ==============================================================
+# WORKER EM SEGUNDO PLANO + BUFFER DUPLO
+# ==============================================================
+@dataclass(frozen=True)
+class StatsResult:
+    stats: Dict
+    pos_version: int     # versão das posições usadas no cálculo
+    time_sim: float      # tempo simulado do retrato
+    computed_at: float   # instante (epoch) em que o resultado ficou pronto
+
+class StatsWorker:
+    """
+    Calcula as stats fora da thread da requisição. O resultado é escrito no
+    buffer de trás e publicado trocando o índice do buffer da frente, de modo
+    que a leitura (latest) nunca espera pelo cálculo. No máximo um cálculo
+    fica em andamento; enquanto isso, novos pedidos são recusados.
+
+    Por padrão usa uma thread; como compute_stats é pura e recebe só tuplas,
+    um ProcessPoolExecutor também pode ser passado como executor.
+    """
+    def __init__(self, executor: Optional[Executor] = None):
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="stats")
+        self._buffers: List[Optional[StatsResult]] = [None, None]
+        self._front = 0
+        self._lock = threading.Lock()
+        self._pending: Optional[Future] = None
+        self._generation = 0   # muda ao trocar de log: descarta cálculos antigos
+        self.published = 0     # nº de publicações (entra na versão do quadro)
+
+    def busy(self) -> bool:
+        return self._pending is not None and not self._pending.done()
+
+    def submit(self, positions: Positions, R: float, pos_version: int, time_sim: float) -> bool:
+        """Agenda um cálculo; False se já há um em andamento."""
+        with self._lock:
+            if self.busy():
+                return False
+            gen = self._generation
+            fut = self._executor.submit(compute_stats, positions, R)
+            self._pending = fut
+        fut.add_done_callback(lambda f: self._publish(f, gen, pos_version, time_sim))
+        return True
+
+    def _publish(self, fut: Future, gen: int, pos_version: int, time_sim: float) -> None:
+        if fut.cancelled() or fut.exception() is not None:
+            return  # o próximo pedido tenta de novo
+        res = StatsResult(fut.result(), pos_version, time_sim, time.time())
+        with self._lock:
+            if gen != self._generation:
+                return
+            back = 1 - self._front
+            self._buffers[back] = res
+            self._front = back
+            self.published += 1
+
+    def latest(self) -> Optional[StatsResult]:
+        """Último resultado publicado (não bloqueia)."""
+        return self._buffers[self._front]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._buffers = [None, None]
+            self._front = 0
+            self.published += 1
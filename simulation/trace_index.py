@@ -0,0 +1,154 @@
+# simulation/trace_index.py
+from __future__ import annotations
+import json
+import os
+from bisect import bisect_left
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+from xml.parsers import expat
+
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+CHECKPOINT_BYTES = 4 << 20   # um checkpoint a cada ~4 MiB do log
+SCAN_CHUNK = 1 << 20
+
+_MEMO: Dict[str, 'TraceIndex'] = {}   # índices que não puderam ser gravados em disco
+
+# ==============================================================
+# ÍNDICE ESPARSO (tempo -> offset em bytes) DO LOG XML
+# ==============================================================
+@dataclass
+class Checkpoint:
+    offset: int          # início de um filho de <simulationrun>
+    time: float          # maior tempo visto ANTES do offset (-inf no início)
+    positions: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+                         # última posição (mundo) de cada nó que já se moveu
+
+@dataclass
+class TraceIndex:
+    """
+    Checkpoints esparsos de um log Grubix. Supõe que os registros de
+    <simulationrun> estão em ordem de tempo (como o simulador os grava):
+    tudo a partir de um checkpoint tem tempo >= checkpoint.time.
+    """
+    size: int
+    mtime_ns: int
+    run_start: int                      # offset de '<simulationrun'
+    time_max: float = 0.0
+    checkpoints: List[Checkpoint] = field(default_factory=list)
+    version: int = INDEX_VERSION
+
+    def checkpoint_before(self, t0: float) -> Optional[Checkpoint]:
+        """Último checkpoint cujo trecho seguinte só contém registros com tempo >= t0."""
+        times = [cp.time for cp in self.checkpoints]
+        i = bisect_left(times, t0) - 1
+        return self.checkpoints[max(i, 0)] if self.checkpoints else None
+
+    def matches(self, path: str) -> bool:
+        st = os.stat(path)
+        return self.version == INDEX_VERSION and st.st_size == self.size and st.st_mtime_ns == self.mtime_ns
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(asdict(self), f)
+
+    @classmethod
+    def load(cls, path: str) -> 'TraceIndex':
+        with open(path) as f:
+            raw = json.load(f)
+        raw["checkpoints"] = [Checkpoint(cp["offset"], cp["time"],
+                                         {k: tuple(v) for k, v in cp["positions"].items()})
+                              for cp in raw["checkpoints"]]
+        return cls(**raw)
+
+# ==============================================================
+# PASSO DE INDEXAÇÃO (expat: dá o offset em bytes de cada tag)
+# ==============================================================
+def build_index(log_path: str, every: int = CHECKPOINT_BYTES) -> TraceIndex:
+    st = os.stat(log_path)
+    index = TraceIndex(size=st.st_size, mtime_ns=st.st_mtime_ns, run_start=-1)
+    parser = expat.ParserCreate()
+    depth = 0
+    in_run = False
+    run_tag = ""               # filho de <simulationrun> sendo lido
+    reading_time = False
+    text: List[str] = []
+    positions: Dict[str, Tuple[float, float]] = {}
+    time_seen = float("-inf")
+    last_cp = -every
+
+    def start(name, attrs):
+        nonlocal depth, in_run, run_tag, reading_time, last_cp, time_seen
+        depth += 1
+        if depth == 2 and name == "simulationrun":
+            in_run = True
+            index.run_start = parser.CurrentByteIndex
+        elif in_run and depth == 3:
+            run_tag = name.lower()
+            offset = parser.CurrentByteIndex
+            if offset - last_cp >= every:
+                index.checkpoints.append(Checkpoint(offset, time_seen, dict(positions)))
+                last_cp = offset
+            if run_tag == "move":
+                t = float(attrs.get("time", "0"))
+                time_seen = max(time_seen, t)
+                positions[attrs.get("id")] = (10.0 * float(attrs.get("x")),
+                                              10.0 * float(attrs.get("y")))
+        elif in_run and depth == 4 and run_tag == "enqueue" and name == "time":
+            reading_time = True
+            text.clear()
+
+    def end(name):
+        nonlocal depth, in_run, reading_time, time_seen
+        if reading_time and depth == 4:
+            reading_time = False
+            try:
+                time_seen = max(time_seen, float("".join(text)))
+            except ValueError:
+                pass
+        if depth == 2 and name == "simulationrun":
+            in_run = False
+        depth -= 1
+
+    def chars(data):
+        if reading_time:
+            text.append(data)
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = chars
+    with open(log_path, "rb") as f:
+        try:
+            while True:
+                chunk = f.read(SCAN_CHUNK)
+                parser.Parse(chunk, not chunk)
+                if not chunk:
+                    break
+        except (expat.ExpatError, TypeError) as e:
+            # XML malformado ou <move> sem x/y: erro de arquivo inválido, como no parser
+            raise ValueError(f"log inválido: {e}") from e
+    index.time_max = time_seen if time_seen != float("-inf") else 0.0
+    return index
+
+def index_path(log_path: str) -> str:
+    return log_path + INDEX_SUFFIX
+
+def get_index(log_path: str) -> TraceIndex:
+    """Índice do log: lê do disco se válido; senão indexa (uma vez) e grava ao lado."""
+    log_path = os.path.abspath(log_path)
+    memo = _MEMO.get(log_path)
+    if memo is not None and memo.matches(log_path):
+        return memo
+    ipath = index_path(log_path)
+    try:
+        index = TraceIndex.load(ipath)
+        if index.matches(log_path):
+            return index
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    index = build_index(log_path)
+    try:
+        index.save(ipath)
+    except OSError:
+        _MEMO[log_path] = index  # diretório só leitura: mantém em memória
+    return index
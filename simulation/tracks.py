@@ -0,0 +1,62 @@
+# simulation/tracks.py
+from __future__ import annotations
+import math
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, List
+from .models import Position
+
+TRACK_STEP_PX = 2.0   # distância mínima (px na tela) entre pontos da trilha
+LEVEL_MIN, LEVEL_MAX = -20, 20
+
+def scale_level(scale: float) -> int:
+    """Quantiza a escala (px por unidade) em potências de 2."""
+    if not scale or scale <= 0:
+        return 0
+    return max(LEVEL_MIN, min(LEVEL_MAX, int(round(math.log2(scale)))))
+
+# ==============================================================
+# TRILHA SIMPLIFICADA (decimação por passo de tela, incremental)
+# ==============================================================
+@dataclass
+class SimplifiedTrack:
+    tolerance: float                      # passo mínimo em unidades do mundo
+    points: List[Position] = field(default_factory=list)
+    times: List[float] = field(default_factory=list)
+    consumed: int = 0                     # pontos brutos já processados
+
+    def extend(self, track: List[Position]) -> None:
+        """Processa apenas os pontos brutos novos desde a última chamada."""
+        if self.consumed > len(track):   # trilha foi reiniciada
+            self.points.clear(); self.times.clear(); self.consumed = 0
+        tol2 = self.tolerance * self.tolerance
+        for p in track[self.consumed:]:
+            if self.points:
+                q = self.points[-1]
+                if (p.x - q.x) ** 2 + (p.y - q.y) ** 2 < tol2:
+                    continue
+            self.points.append(p)
+            self.times.append(p.time)
+        self.consumed = len(track)
+
+    def window(self, t_min: float, last: Position) -> List[Position]:
+        """Pontos com tempo >= t_min, terminando no último ponto bruto."""
+        out = self.points[bisect_left(self.times, t_min):]
+        if not out or out[-1] is not last:
+            out = out + [last]
+        return out
+
+@dataclass
+class TrackCache:
+    """Trilhas simplificadas de um nó, uma por nível de zoom."""
+    levels: Dict[int, SimplifiedTrack] = field(default_factory=dict)
+
+    def simplified(self, track: List[Position], scale: float,
+                   window: float) -> List[Position]:
+        level = scale_level(scale)
+        st = self.levels.get(level)
+        if st is None:
+            st = self.levels[level] = SimplifiedTrack(TRACK_STEP_PX / (2.0 ** level))
+        st.extend(track)
+        last = track[-1]
+        return st.window(last.time - window, last)
@@ -0,0 +1,99 @@
+# simulation/traffic.py
+from __future__ import annotations
+import heapq
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from .models import EventMsg
+
+TRAFFIC_TAU = 5.0       # constante de decaimento das taxas (tempo simulado)
+_REBASE_EXP = 50.0      # rebase quando exp((t - t_ref)/tau) ficaria grande demais
+RATE_KINDS = ("sent", "received", "fanout", "total")   # total = enviados + recebidos
+
+Link = Tuple[int, int]  # (origem, destino)
+
+# ==============================================================
+# CONTADORES DE TRÁFEGO (por nó e por enlace)
+# ==============================================================
+@dataclass
+class TrafficCounters:
+    """
+    Contadores acumulados e taxas com decaimento exponencial, atualizados
+    a cada EventMsg consumido. As taxas são guardadas em relação a um
+    instante de referência (t_ref): somar um evento em t custa O(1) e,
+    como todas decaem com o mesmo fator, o máximo também é mantido em O(1).
+    Cada tipo de RATE_KINDS tem os seus pesos (e o seu máximo) por nó.
+    """
+    tau: float = TRAFFIC_TAU
+    t_ref: float = 0.0
+    sent: Dict[int, int] = field(default_factory=dict)
+    received: Dict[int, int] = field(default_factory=dict)
+    fanout: Dict[int, int] = field(default_factory=dict)   # destinos alcançados por broadcast
+    links: Dict[Link, int] = field(default_factory=dict)
+    _node_w: Dict[str, Dict[int, float]] = field(
+        default_factory=lambda: {k: {} for k in RATE_KINDS})
+    _link_w: Dict[Link, float] = field(default_factory=dict)
+    _node_w_max: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(RATE_KINDS, 0.0))
+
+    def record(self, ev: EventMsg, t: float) -> None:
+        if (t - self.t_ref) / self.tau > _REBASE_EXP:
+            self._rebase(t)
+        w = math.exp((t - self.t_ref) / self.tau)
+        src = ev.source.node_id
+        self.sent[src] = self.sent.get(src, 0) + 1
+        self._bump("sent", src, w)
+        self._bump("total", src, w)
+        if ev.broadcast:  # inclusive broadcast ouvido por um só (ou nenhum) vizinho
+            self.fanout[src] = self.fanout.get(src, 0) + len(ev.destinations)
+            self._bump("fanout", src, w * len(ev.destinations))
+        for d in ev.destinations:
+            dst = d.node_id
+            self.received[dst] = self.received.get(dst, 0) + 1
+            self.links[(src, dst)] = self.links.get((src, dst), 0) + 1
+            self._link_w[(src, dst)] = self._link_w.get((src, dst), 0.0) + w
+            self._bump("received", dst, w)
+            self._bump("total", dst, w)
+
+    def _bump(self, kind: str, node_id: int, w: float) -> None:
+        weights = self._node_w[kind]
+        v = weights.get(node_id, 0.0) + w
+        weights[node_id] = v
+        if v > self._node_w_max[kind]:
+            self._node_w_max[kind] = v
+
+    def _rebase(self, t: float) -> None:
+        """Traz os pesos para a referência t (raro: a cada ~50 tau)."""
+        f = math.exp(-(t - self.t_ref) / self.tau)
+        for weights in self._node_w.values():
+            for k in weights:
+                weights[k] *= f
+        for k in self._link_w:
+            self._link_w[k] *= f
+        for kind in self._node_w_max:
+            self._node_w_max[kind] *= f
+        self.t_ref = t
+
+    def _decay(self, now: float) -> float:
+        return math.exp(-(now - self.t_ref) / self.tau) / self.tau
+
+    def node_rate(self, node_id: int, now: float, kind: str = "total") -> float:
+        """
+        Taxa do nó por unidade de tempo simulado: pacotes enviados ("sent"),
+        recebidos ("received"), ambos ("total") ou destinos de broadcast ("fanout").
+        """
+        return self._node_w[kind].get(node_id, 0.0) * self._decay(now)
+
+    def link_rate(self, link: Link, now: float) -> float:
+        return self._link_w.get(link, 0.0) * self._decay(now)
+
+    def intensity(self, node_id: int, kind: str = "total") -> float:
+        """Taxa do nó relativa ao nó mais ativo no mesmo tipo (0..1), em O(1)."""
+        if self._node_w_max[kind] <= 0.0:
+            return 0.0
+        return self._node_w[kind].get(node_id, 0.0) / self._node_w_max[kind]
+
+    def top_links(self, n: int, now: float) -> List[Dict]:
+        best = heapq.nlargest(n, self._link_w.items(), key=lambda kv: kv[1])
+        decay = self._decay(now)
+        return [{"source": s, "dest": d, "count": self.links[(s, d)], "rate": w * decay}
+                for (s, d), w in best]
@@ -0,0 +1,120 @@
+# simulation/uploads.py
+from __future__ import annotations
+import lzma
+import threading
+import time
+import uuid
+import zlib
+from xml.etree import ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from .compression import StreamDecoder
+from .models import DataSimulation
+from .xml_reader import TraceParser
+
+UPLOAD_TTL_SEC = 6 * 3600  # sessões de upload abandonadas expiram
+# erros de arquivo inválido (XML malformado, compressão corrompida)
+INGEST_ERRORS = (ET.ParseError, ValueError, OSError, EOFError, zlib.error, lzma.LZMAError)
+
+# ==============================================================
+# INGESTÃO: bytes enviados -> descompressão -> parser incremental
+# ==============================================================
+@dataclass
+class TraceIngest:
+    """Pipeline em streaming, sem arquivo intermediário."""
+    name: str = ""
+    received: int = 0
+    error: Optional[Exception] = None   # 1º erro de arquivo inválido (upload via handler)
+    decoder: StreamDecoder = field(init=False)
+    parser: TraceParser = field(default_factory=TraceParser)
+
+    def __post_init__(self):
+        self.decoder = StreamDecoder(self.name)
+
+    def feed(self, chunk: bytes) -> None:
+        self.received += len(chunk)
+        self.parser.feed(self.decoder.feed(chunk))
+
+    def feed_all(self, chunks: Iterable[bytes]) -> DataSimulation:
+        for chunk in chunks:
+            self.feed(chunk)
+        return self.finish()
+
+    def finish(self) -> DataSimulation:
+        if self.error is not None:
+            raise self.error
+        self.parser.feed(self.decoder.flush())
+        return self.parser.close()
+
+class TraceUploadHandler(FileUploadHandler):
+    """
+    Upload handler do Django que entrega cada pedaço do campo `file`
+    direto ao TraceIngest, em vez de acumulá-lo em memória/arquivo temporário.
+    Os pedaços chegam enquanto request.POST é lido (pelo CSRF, antes da view):
+    um erro de arquivo inválido é guardado e relançado por finish().
+    """
+    field = "file"
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.ingest = TraceIngest(name=file_name) if field_name == self.field else None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.ingest is None:
+            return raw_data  # outros campos seguem para os handlers padrão
+        if self.ingest.error is None:
+            try:
+                self.ingest.feed(raw_data)
+            except INGEST_ERRORS as e:
+                self.ingest.error = e  # ignora o restante do arquivo
+        return None
+
+    def file_complete(self, file_size):
+        if self.ingest is None:
+            return None
+        uploaded = UploadedFile(name=self.file_name, size=file_size)
+        uploaded.ingest = self.ingest
+        return uploaded
+
+# ==============================================================
+# UPLOAD EM PARTES (retomável): cada parte informa seu offset
+# ==============================================================
+@dataclass
+class UploadSession:
+    upload_id: str
+    ingest: TraceIngest
+    size: Optional[int] = None          # tamanho total anunciado (opcional)
+    touched: float = field(default_factory=time.time)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def offset(self) -> int:
+        return self.ingest.received
+
+class UploadRegistry:
+    def __init__(self):
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, size: Optional[int] = None) -> UploadSession:
+        self._expire()
+        sess = UploadSession(uuid.uuid4().hex, TraceIngest(name=name), size)
+        with self._lock:
+            self._sessions[sess.upload_id] = sess
+        return sess
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        with self._lock:
+            return self._sessions.get(upload_id)
+
+    def discard(self, upload_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+
+    def _expire(self) -> None:
+        limit = time.time() - UPLOAD_TTL_SEC
+        with self._lock:
+            for k in [k for k, s in self._sessions.items() if s.touched < limit]:
+                del self._sessions[k]
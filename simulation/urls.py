@@ -4,6 +4,12 @@ from . import views
 urlpatterns = [
     path("", views.index, name="index"),
     path("api/upload", views.api_upload, name="api_upload"),
+    path("api/upload/start", views.api_upload_start, name="api_upload_start"),
+    path("api/upload/status", views.api_upload_status, name="api_upload_status"),
+    path("api/upload/chunk", views.api_upload_chunk, name="api_upload_chunk"),
+    path("api/upload/finish", views.api_upload_finish, name="api_upload_finish"),
+    path("api/traces", views.api_traces, name="api_traces"),
+    path("api/load", views.api_load, name="api_load"),
     path("api/state", views.api_state, name="api_state"),
     path("api/play", views.api_play, name="api_play"),
     path("api/pause", views.api_pause, name="api_pause"),
@@ -11,7 +17,13 @@ urlpatterns = [
     path("api/step_f", views.api_step_forward, name="api_step_forward"),
     path("api/step_b", views.api_step_back, name="api_step_back"),
     path("api/speed", views.api_speed, name="api_speed"),
+    path("api/track/window", views.api_track_window, name="api_track_window"),
     path("api/close", views.api_close, name="api_close"),
     path("api/mapping/list", views.api_mapping_list, name="api_mapping_list"),
     path("api/mapping/set",  views.api_mapping_set,  name="api_mapping_set"),
+    path("api/traffic", views.api_traffic, name="api_traffic"),
+    path("api/nodes/nearest", views.api_nodes_nearest, name="api_nodes_nearest"),
+    path("api/nodes/rect", views.api_nodes_rect, name="api_nodes_rect"),
+    path("api/nodes/<int:node_id>/neighbors", views.api_nodes_neighbors, name="api_nodes_neighbors"),
+    path("api/nodes/<int:node_id>/knn", views.api_nodes_knn, name="api_nodes_knn"),
 ]
@@ -1,69 +1,254 @@
 from __future__ import annotations
-from django.http import JsonResponse, HttpRequest, HttpResponse
+import hashlib, math, os, threading, time
+from django.conf import settings
+from django.http import JsonResponse, HttpRequest, HttpResponse, HttpResponseNotModified
 from django.shortcuts import render
 from django.views.decorators.http import require_http_methods
-from .xml_reader import XMLReader
 from .simulation_core import SimulationController
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.decorators.http import require_GET, require_POST
 from .mapping import MAPPINGS
+from .frames import FrameCache
 
 SIM = SimulationController()
+# o servidor atende requisições em threads: todo acesso ao SIM (tick, snapshot,
+# comandos, consultas) passa por este lock, senão eventos se perdem ou repetem
+SIM_LOCK = threading.Lock()
+FRAMES = FrameCache()
+# ingestão (XML, descompressão, uploads) só é importada no primeiro upload/carga:
+# o processo sobe e serve a página e /api/state sem esses módulos
+_UPLOADS = None
+_UPLOADS_LOCK = threading.Lock()
+UPLOAD_READ_CHUNK = 256 * 1024  # leitura do corpo das partes (bytes)
 
 @ensure_csrf_cookie
 def index(request: HttpRequest) -> HttpResponse:
     return render(request, "simulation/index.html")
 
+@csrf_exempt
 @require_http_methods(["POST"])
 def api_upload(request: HttpRequest) -> JsonResponse:
-    file = request.FILES.get("file")
-    print(file)
-    if not file:
-        return JsonResponse({"ok": False, "error": "Arquivo não enviado"}, status=400)
-    import tempfile, os
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".xml") as tmp:
-        for chunk in file.chunks():
-            tmp.write(chunk)
-        tmp_path = tmp.name
+    # o handler precisa ser trocado antes de qualquer leitura de request.POST
+    # (inclusive pelo CSRF): por isso a checagem de CSRF vem na view interna
+    from .uploads import TraceUploadHandler
+    request.upload_handlers = [TraceUploadHandler(request)]
+    return _api_upload(request)
+
+@csrf_protect
+def _api_upload(request: HttpRequest) -> JsonResponse:
+    # .xml, .xml.gz, .bz2, .xz (e .zst): os pedaços vão direto ao parser
+    # incremental enquanto chegam, sem arquivo intermediário
+    from .uploads import INGEST_ERRORS
+    try:
+        file = request.FILES.get("file")
+        if not file:
+            return JsonResponse({"ok": False, "error": "Arquivo não enviado"}, status=400)
+        data = file.ingest.finish()
+    except INGEST_ERRORS as e:
+        return JsonResponse({"ok": False, "error": f"Arquivo inválido: {e}"}, status=400)
+    with SIM_LOCK:
+        SIM.init(data)
+    return JsonResponse({"ok": True})
+
+# ----- Upload em partes (retomável) -----
+def _uploads():
+    """Registro de uploads em partes (criado no primeiro uso)."""
+    global _UPLOADS
+    with _UPLOADS_LOCK:
+        if _UPLOADS is None:
+            from .uploads import UploadRegistry
+            _UPLOADS = UploadRegistry()
+        return _UPLOADS
+
+@require_POST
+def api_upload_start(request: HttpRequest) -> JsonResponse:
+    try:
+        size = int(request.POST["size"]) if request.POST.get("size") else None
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "size inválido"}, status=400)
+    sess = _uploads().start(request.POST.get("name", ""), size)
+    return JsonResponse({"ok": True, "upload_id": sess.upload_id, "offset": 0})
+
+@require_GET
+def api_upload_status(request: HttpRequest) -> JsonResponse:
+    sess = _uploads().get(request.GET.get("upload_id", ""))
+    if sess is None:
+        return JsonResponse({"ok": False, "error": "upload inexistente"}, status=404)
+    return JsonResponse({"ok": True, "offset": sess.offset, "size": sess.size})
+
+@require_POST
+def api_upload_chunk(request: HttpRequest) -> JsonResponse:
+    """Corpo = bytes crus da parte; ?offset= deve ser igual ao já recebido."""
+    sess = _uploads().get(request.GET.get("upload_id", ""))
+    if sess is None:
+        return JsonResponse({"ok": False, "error": "upload inexistente"}, status=404)
+    try:
+        offset = int(request.GET.get("offset", ""))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "offset inválido"}, status=400)
+    from .uploads import INGEST_ERRORS
+    with sess.lock:
+        if offset != sess.offset:
+            return JsonResponse({"ok": False, "error": "offset fora de ordem",
+                                 "offset": sess.offset}, status=409)
+        sess.touched = time.time()
+        while True:
+            try:
+                buf = request.read(UPLOAD_READ_CHUNK)
+            except OSError:
+                # conexão interrompida (UnreadablePostError etc.): a sessão continua
+                # válida e o offset já reflete o que foi processado
+                return JsonResponse({"ok": False, "error": "parte interrompida",
+                                     "offset": sess.offset}, status=400)
+            if not buf:
+                break
+            try:
+                sess.ingest.feed(buf)
+            except INGEST_ERRORS as e:
+                _uploads().discard(sess.upload_id)
+                return JsonResponse({"ok": False, "error": f"Arquivo inválido: {e}"}, status=400)
+        return JsonResponse({"ok": True, "offset": sess.offset})
+
+@require_POST
+def api_upload_finish(request: HttpRequest) -> JsonResponse:
+    sess = _uploads().get(request.GET.get("upload_id", ""))
+    if sess is None:
+        return JsonResponse({"ok": False, "error": "upload inexistente"}, status=404)
+    from .uploads import INGEST_ERRORS
+    with sess.lock:
+        if sess.size is not None and sess.offset != sess.size:
+            return JsonResponse({"ok": False, "error": "upload incompleto",
+                                 "offset": sess.offset}, status=409)
+        _uploads().discard(sess.upload_id)
+        try:
+            data = sess.ingest.finish()
+        except INGEST_ERRORS as e:
+            return JsonResponse({"ok": False, "error": f"Arquivo inválido: {e}"}, status=400)
+    with SIM_LOCK:
+        SIM.init(data)
+    return JsonResponse({"ok": True})
+
+# ----- Logs no servidor (carga parcial por janela de tempo) -----
+def _trace_path(name: str):
+    """Caminho do log dentro de SIMULATION_TRACE_DIR (None se fora dele)."""
+    base = os.path.realpath(settings.SIMULATION_TRACE_DIR)
+    path = os.path.realpath(os.path.join(base, name))
+    if os.path.dirname(path) != base or not path.endswith(".xml") or not os.path.isfile(path):
+        return None
+    return path
+
+@require_GET
+def api_traces(request: HttpRequest) -> JsonResponse:
+    from .trace_index import index_path
+    base = settings.SIMULATION_TRACE_DIR
+    names = sorted(n for n in os.listdir(base) if n.endswith(".xml")) if os.path.isdir(base) else []
+    items = [{"name": n,
+              "size": os.path.getsize(os.path.join(base, n)),
+              "indexed": os.path.exists(index_path(os.path.join(base, n)))} for n in names]
+    return JsonResponse({"ok": True, "traces": items})
+
+@require_POST
+def api_load(request: HttpRequest) -> JsonResponse:
+    path = _trace_path(request.POST.get("name", ""))
+    if path is None:
+        return JsonResponse({"ok": False, "error": "log inexistente"}, status=404)
+    try:
+        t0 = float(request.POST.get("t0") or "-inf")
+        t1 = float(request.POST.get("t1") or "inf")
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "janela inválida"}, status=400)
+    from .uploads import INGEST_ERRORS
+    from .xml_reader import XMLReader
     try:
-        reader = XMLReader()
-        data = reader.read_dom(tmp_path)
+        data = XMLReader().read_window(path, t0, t1)
+    except INGEST_ERRORS as e:
+        return JsonResponse({"ok": False, "error": f"Arquivo inválido: {e}"}, status=400)
+    with SIM_LOCK:
         SIM.init(data)
-        return JsonResponse({"ok": True})
-    finally:
-        try: os.remove(tmp_path)
-        except Exception: pass
+    return JsonResponse({"ok": True, "events": len(data.events)})
+
+def _float_param(request: HttpRequest, name: str, required: bool = False):
+    """
+    Lê um parâmetro numérico da query string (None se ausente e opcional).
+    ValueError se faltar um obrigatório ou se não for um número finito
+    (inf/nan quebram a grade espacial).
+    """
+    raw = request.GET.get(name)
+    if raw is None or raw == "":
+        if required:
+            raise ValueError(f"{name} ausente")
+        return None
+    value = float(raw)
+    if not math.isfinite(value):
+        raise ValueError(f"{name} não finito")
+    return value
 
 @require_http_methods(["GET"])
-def api_state(request: HttpRequest) -> JsonResponse:
-    SIM.tick()
-    return JsonResponse(SIM.snapshot())
+def api_state(request: HttpRequest) -> HttpResponse:
+    try:
+        x0, y0, x1, y1 = (_float_param(request, k) for k in ("x0", "y0", "x1", "y1"))
+        scale = _float_param(request, "scale")
+        sel = request.GET.get("sel")
+        selected = int(sel) if sel else None
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "viewport inválido"}, status=400)
+    viewport = (x0, y0, x1, y1) if None not in (x0, y0, x1, y1) else None
+    # ETag = versão do quadro + parâmetros da consulta. Fraco (W/): o mesmo quadro
+    # sai em gzip, br ou sem compressão, bytes diferentes com o mesmo conteúdo
+    query = hashlib.blake2b(repr((viewport, scale, selected)).encode(), digest_size=6).hexdigest()
+    state = None
+    with SIM_LOCK:
+        SIM.tick()
+        # versão e corpo lidos no mesmo trecho sob o lock: nenhum tick entre os dois
+        etag = f'W/"{SIM.frame_version()}-{query}"'
+        frame = FRAMES.get(etag)
+        if frame is None and request.headers.get("If-None-Match") != etag:
+            state = SIM.snapshot(viewport=viewport, scale=scale, selected=selected)
+    if request.headers.get("If-None-Match") == etag:
+        resp = HttpResponseNotModified()
+        resp["ETag"] = etag
+        return resp
+    if frame is None:
+        frame = FRAMES.put(etag, state)  # serialização (JSON) fora do lock
+    body, encoding = frame.pick(request.headers.get("Accept-Encoding", ""))
+    resp = HttpResponse(body, content_type="application/json")
+    if encoding:
+        resp["Content-Encoding"] = encoding
+    resp["ETag"] = etag
+    resp["Cache-Control"] = "no-cache"
+    resp["Vary"] = "Accept-Encoding"
+    return resp
 
 @csrf_exempt
 @require_http_methods(["POST"])
 def api_play(request: HttpRequest) -> JsonResponse:
-    SIM.play()
+    with SIM_LOCK:
+        SIM.play()
     return JsonResponse({"ok": True})
 
 @require_http_methods(["POST"])
 def api_pause(request: HttpRequest) -> JsonResponse:
-    SIM.pause()
+    with SIM_LOCK:
+        SIM.pause()
     return JsonResponse({"ok": True})
 
 @require_http_methods(["POST"])
 def api_back(request: HttpRequest) -> JsonResponse:
-    SIM.back()
+    with SIM_LOCK:
+        SIM.back()
     return JsonResponse({"ok": True})
 
 @require_http_methods(["POST"])
 def api_step_forward(request: HttpRequest) -> JsonResponse:
-    SIM.step_forward()
+    with SIM_LOCK:
+        SIM.step_forward()
     return JsonResponse({"ok": True})
 
 @require_http_methods(["POST"])
 def api_step_back(request: HttpRequest) -> JsonResponse:
-    SIM.step_back()
+    with SIM_LOCK:
+        SIM.step_back()
     return JsonResponse({"ok": True})
 
 @require_http_methods(["POST"])
@@ -72,12 +257,24 @@ def api_speed(request: HttpRequest) -> JsonResponse:
         sp = float(request.POST.get("speed", "1.0"))
     except ValueError:
         return JsonResponse({"ok": False, "error": "speed inválido"}, status=400)
-    SIM.speed = max(0.05, sp)
-    return JsonResponse({"ok": True, "speed": SIM.speed})
+    with SIM_LOCK:
+        SIM.speed = max(0.05, sp)
+        return JsonResponse({"ok": True, "speed": SIM.speed})
+
+@require_http_methods(["POST"])
+def api_track_window(request: HttpRequest) -> JsonResponse:
+    try:
+        window = float(request.POST.get("window", ""))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "window inválido"}, status=400)
+    with SIM_LOCK:
+        SIM.track_window = max(0.0, window)
+        return JsonResponse({"ok": True, "window": SIM.track_window})
 
 @require_POST
 def api_close(request: HttpRequest) -> JsonResponse:
-    SIM.close()
+    with SIM_LOCK:
+        SIM.close()
     return JsonResponse({"ok": True})
 
 @require_GET
@@ -90,5 +287,61 @@ def api_mapping_set(request: HttpRequest) -> JsonResponse:
     key = (request.POST.get("key") or "").strip()
     if key not in MAPPINGS:
         return JsonResponse({"ok": False, "error": "mapping inválido"}, status=400)
-    SIM.set_mapping(key)
-    return JsonResponse({"ok": True, "current": SIM.mapping_key})
\ No newline at end of file
+    with SIM_LOCK:
+        SIM.set_mapping(key)
+        return JsonResponse({"ok": True, "current": SIM.mapping_key})
+
+@require_GET
+def api_nodes_nearest(request: HttpRequest) -> JsonResponse:
+    try:
+        x, y = _float_param(request, "x", True), _float_param(request, "y", True)
+        tol = _float_param(request, "tol")
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "ponto inválido"}, status=400)
+    with SIM_LOCK:
+        node = SIM.node_at(x, y, tol if tol is not None else float("inf"))
+    return JsonResponse({"ok": True, "node": node})
+
+@require_GET
+def api_nodes_neighbors(request: HttpRequest, node_id: int) -> JsonResponse:
+    try:
+        radius = _float_param(request, "radius")
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "radius inválido"}, status=400)
+    with SIM_LOCK:
+        neigh = SIM.neighbors_of(node_id, radius)
+    if neigh is None:
+        return JsonResponse({"ok": False, "error": "nó inexistente"}, status=404)
+    return JsonResponse({"ok": True, "id": node_id, "neighbors": neigh})
+
+@require_GET
+def api_nodes_knn(request: HttpRequest, node_id: int) -> JsonResponse:
+    try:
+        k = int(request.GET.get("k", "5"))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "k inválido"}, status=400)
+    with SIM_LOCK:
+        found = SIM.knn_of(node_id, max(0, k))
+    if found is None:
+        return JsonResponse({"ok": False, "error": "nó inexistente"}, status=404)
+    return JsonResponse({"ok": True, "id": node_id, "neighbors": found})
+
+@require_GET
+def api_nodes_rect(request: HttpRequest) -> JsonResponse:
+    try:
+        x0, y0, x1, y1 = (_float_param(request, k, True) for k in ("x0", "y0", "x1", "y1"))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "retângulo inválido"}, status=400)
+    with SIM_LOCK:
+        nodes = SIM.nodes_in_rect(x0, y0, x1, y1)
+    return JsonResponse({"ok": True, "nodes": nodes})
+
+@require_GET
+def api_traffic(request: HttpRequest) -> JsonResponse:
+    try:
+        top = int(request.GET.get("top", "20"))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "top inválido"}, status=400)
+    with SIM_LOCK:
+        summary = SIM.traffic_summary(max(0, top))
+    return JsonResponse({"ok": True, **summary})
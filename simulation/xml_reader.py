@@ -1,10 +1,13 @@
 from __future__ import annotations
 from xml.etree import ElementTree as ET
-from typing import List
+from typing import BinaryIO, List, Optional, Tuple, Union
 from .models import DataSimulation, Node, State, EventMsg, EventMove, Move
+from .trace_index import get_index
+
+READ_CHUNK = 1 << 20  # 1 MiB por leitura na leitura incremental
 
 class XMLReader:
-    def read_dom(self, file_path:str)->DataSimulation:
+    def read_dom(self, file_path:Union[str, BinaryIO])->DataSimulation:
         tree = ET.parse(file_path)
         root = tree.getroot()
         data = DataSimulation()
@@ -15,16 +18,50 @@ class XMLReader:
         self._create_list_events_moves(data)
         return data
 
-    def iter_sax_like(self, file_path:str)->DataSimulation:
+    def iter_sax_like(self, source:Union[str, BinaryIO])->DataSimulation:
+        """
+        Leitura tipo SAX (push parser) — equivalente conceitual ao ReaderLogXmlSAX.
+        Útil para arquivos grandes: cada tag do <simulationrun> é descartada
+        logo após ser lida. Aceita caminho ou arquivo binário já aberto.
+        """
+        parser = TraceParser(self)
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return parser.feed_file(f)
+        return parser.feed_file(source)
+
+    def read_window(self, file_path:str, t0:float, t1:float)->DataSimulation:
         """
-        Leitura tipo SAX usando iterparse — equivalente conceitual ao ReaderLogXmlSAX.
-        Útil para arquivos grandes.
+        Carrega só o trecho [t0, t1] do log. Usa o índice esparso
+        (tempo -> offset) gravado ao lado do arquivo para pular direto ao
+        checkpoint anterior a t0; as posições em t0 vêm do checkpoint e dos
+        <move> entre ele e t0.
         """
-        return self.read_dom(file_path)
+        index = get_index(file_path)
+        parser = TraceParser(self, window=(t0, t1))
+        with open(file_path, 'rb') as f:
+            # cabeçalho (<configuration>) + abertura de <simulationrun>
+            parser.feed(f.read(max(index.run_start, 0)))
+            parser.feed(b'<simulationrun>')
+            cp = index.checkpoint_before(t0)
+            if cp is None:
+                return parser.close()
+            for node_id, (x, y) in cp.positions.items():
+                node = parser.data.get_node(int(node_id))
+                if node: node.x, node.y = x, y
+            f.seek(cp.offset)
+            while not parser.done:
+                chunk = f.read(READ_CHUNK)
+                if not chunk: break
+                parser.feed(chunk)
+        return parser.close()
 
     def _read_configuration(self, root:ET.Element, data:DataSimulation)->None:
         cfg = root.find('configuration'); 
         if cfg is None: return
+        self._read_configuration_elem(cfg, data)
+
+    def _read_configuration_elem(self, cfg:ET.Element, data:DataSimulation)->None:
         field = cfg.find('field')
         if field is not None:
             data.dimension_x = int(float(field.findtext('x','0')))
@@ -46,27 +83,45 @@ class XMLReader:
         simrun = root.find('simulationrun')
         if simrun is None: return
         for tag in list(simrun):
-            name = tag.tag.lower()
-            if name=='enqueue':
-                tolayer = tag.find('tolayer')
-                sender_layer = tolayer.findtext('senderlayer','') if tolayer is not None else ''
-                if sender_layer.lower()=='physical':
-                    time = float(tag.findtext('time','0.0'))
-                    id_event = int(tag.findtext('id','0'))
-                    receiver_id = int(tag.findtext('receiverid','0'))
-                    sender_id = int(tolayer.findtext('senderid','0'))
-                    intern_receiver_id = int(tolayer.findtext('internreceiverid','0'))
-                    out_states.append(State(id_event,receiver_id,sender_id,intern_receiver_id,time))
-            elif name=='nodestate':
-                pass
-            elif name=='move':
-                node_id = int(tag.attrib.get('id'))
-                x = 10.0*float(tag.attrib.get('x')); y = 10.0*float(tag.attrib.get('y'))
-                t = float(tag.attrib.get('time'))
-                node = data.get_node(node_id)
-                if node:
-                    mv = Move(node=node,time=t,x=x,y=y)
-                    data.add_move(mv); data.add_time_move(t)
+            self._read_run_tag(tag, data, out_states)
+
+    def _read_run_tag(self, tag:ET.Element, data:DataSimulation, out_states:List[State])->None:
+        name = tag.tag.lower()
+        if name=='enqueue':
+            tolayer = tag.find('tolayer')
+            sender_layer = tolayer.findtext('senderlayer','') if tolayer is not None else ''
+            if sender_layer.lower()=='physical':
+                time = float(tag.findtext('time','0.0'))
+                id_event = int(tag.findtext('id','0'))
+                receiver_id = int(tag.findtext('receiverid','0'))
+                sender_id = int(tolayer.findtext('senderid','0'))
+                intern_receiver_id = int(tolayer.findtext('internreceiverid','0'))
+                out_states.append(State(id_event,receiver_id,sender_id,intern_receiver_id,time))
+        elif name=='nodestate':
+            pass
+        elif name=='move':
+            node_id = int(tag.attrib.get('id'))
+            x = 10.0*float(tag.attrib.get('x')); y = 10.0*float(tag.attrib.get('y'))
+            t = float(tag.attrib.get('time'))
+            node = data.get_node(node_id)
+            if node:
+                mv = Move(node=node,time=t,x=x,y=y)
+                data.add_move(mv); data.add_time_move(t)
+
+    def _tag_time(self, tag:ET.Element)->Optional[float]:
+        """Tempo de um filho de <simulationrun> (None se não tiver)."""
+        name = tag.tag.lower()
+        if name=='move':
+            return float(tag.attrib.get('time'))
+        if name=='enqueue':
+            return float(tag.findtext('time','0.0'))
+        return None
+
+    def _place_node(self, tag:ET.Element, data:DataSimulation)->None:
+        """Aplica um <move> só como posição (antes da janela: sem evento/trilha)."""
+        node = data.get_node(int(tag.attrib.get('id')))
+        if node:
+            node.x = 10.0*float(tag.attrib.get('x')); node.y = 10.0*float(tag.attrib.get('y'))
 
     def _create_list_events(self, data:DataSimulation, states:List[State])->None:
         if not states: return
@@ -87,7 +142,8 @@ class XMLReader:
                 if n: dests.append(n)
             src = data.get_node(curr.sender_id)
             if src:
-                data.add_event(EventMsg(time=curr.time, source=src, destinations=dests, amount_packet=amount_packet))
+                data.add_event(EventMsg(time=curr.time, source=src, destinations=dests, amount_packet=amount_packet,
+                                        broadcast=curr.receiver_id == -1))
             i = j
 
     def _create_list_events_moves(self, data:DataSimulation)->None:
@@ -95,16 +151,96 @@ class XMLReader:
         Insere EventMove nos pontos de tempo de movimentos,
         respeitando a ordem temporal (como no Java). 
         """
-        for t in sorted(set(data.times_move)):
-            moves_at_t = [mv for mv in data.moves if mv.time == t]
-            if not moves_at_t: 
+        moves_by_t = {}
+        for mv in data.moves:
+            moves_by_t.setdefault(mv.time, []).append(mv)
+        # intercala (merge) em O(E + M): cada EventMove entra depois de todos
+        # os eventos com tempo <= t, como a inserção um a um fazia
+        merged = []; i = 0; events = data.events
+        for t in sorted(moves_by_t):
+            while i < len(events) and not (t < events[i].time):
+                merged.append(events[i]); i += 1
+            merged.append(EventMove(time=t, moves=moves_by_t[t]))
+        merged.extend(events[i:])
+        data.events[:] = merged
+
+# ==============================================================
+# LEITURA INCREMENTAL (push): bytes entram aos pedaços via feed()
+# ==============================================================
+class TraceParser:
+    """
+    Parser incremental do log. Recebe o XML em pedaços (de um arquivo, de
+    um descompressor ou de um upload em partes) sem guardar a árvore
+    inteira: cada filho de <simulationrun> é convertido e descartado.
+    """
+    def __init__(self, reader:Optional[XMLReader]=None,
+                 window:Optional[Tuple[float, float]]=None):
+        self.reader = reader or XMLReader()
+        self.window = window      # (t0, t1): só registros nesse intervalo
+        self.done = False         # passou de t1: o resto do arquivo é ignorado
+        self.data = DataSimulation()
+        self.states: List[State] = []
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._depth = 0
+        self._simrun: Optional[ET.Element] = None
+
+    def feed(self, chunk:bytes)->None:
+        if chunk and not self.done:
+            self._parser.feed(chunk)
+            self._drain()
+
+    def feed_file(self, f:BinaryIO)->DataSimulation:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk: break
+            self.feed(chunk)
+        return self.close()
+
+    def close(self)->DataSimulation:
+        """Finaliza o XML e monta as listas de eventos (como read_dom)."""
+        if not self.done:  # leitura por janela pode parar no meio do arquivo
+            self._parser.close()
+            self._drain()
+        self.reader._create_list_events(self.data, self.states)
+        self.reader._create_list_events_moves(self.data)
+        return self.data
+
+    def _drain(self)->None:
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                self._depth += 1
+                if self._depth == 2 and elem.tag == 'simulationrun':
+                    self._simrun = elem
                 continue
-            ev = EventMove(time=t, moves=moves_at_t) 
-            inserted=False
-            for idx, e in enumerate(data.events):
-                if t < e.time:
-                    data.events.insert(idx, ev)
-                    inserted = True
-                    break
-            if not inserted: 
-                data.events.append(ev)
+            self._depth -= 1
+            if self._depth == 1:
+                if elem.tag == 'configuration':
+                    self.reader._read_configuration_elem(elem, self.data)
+                    elem.clear()
+                elif elem is self._simrun:
+                    self._simrun = None
+            elif self._depth == 2 and self._simrun is not None:
+                # filho direto de <simulationrun>: converte e descarta
+                if not self.done:
+                    self._read_run_elem(elem)
+                self._simrun.clear()
+
+    def _read_run_elem(self, elem:ET.Element)->None:
+        try:
+            self._read_run_elem_in_window(elem)
+        except TypeError as e:  # atributo ausente (ex.: <move> sem x/y): float(None)
+            raise ValueError(f"<{elem.tag}> incompleto: {e}") from e
+
+    def _read_run_elem_in_window(self, elem:ET.Element)->None:
+        if self.window is None:
+            self.reader._read_run_tag(elem, self.data, self.states)
+            return
+        t0, t1 = self.window
+        t = self.reader._tag_time(elem)
+        if t is not None and t > t1:
+            self.done = True
+        elif t is not None and t < t0:
+            if elem.tag.lower() == 'move':
+                self.reader._place_node(elem, self.data)
+        else:
+            self.reader._read_run_tag(elem, self.data, self.states)